@@ -6,6 +6,8 @@ CREATE TABLE IF NOT EXISTS requests (
     quantity INTEGER NOT NULL,
     digits INTEGER NOT NULL,
     status VARCHAR(50) DEFAULT 'pending',
+    -- Primes stored so far, updated in the same transaction as their insert
+    generated_count INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -19,9 +21,33 @@ CREATE TABLE IF NOT EXISTS prime_numbers (
     UNIQUE(request_id, prime_value)
 );
 
+-- Table to store primality check requests
+CREATE TABLE IF NOT EXISTS check_requests (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    quantity INTEGER NOT NULL,
+    status VARCHAR(50) DEFAULT 'pending',
+    -- Estimated worst-case seconds to check the whole batch, for the backlog metric
+    estimated_seconds DOUBLE PRECISION NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Table to store primality verdicts, one row per checked number
+CREATE TABLE IF NOT EXISTS check_results (
+    id SERIAL PRIMARY KEY,
+    request_id UUID NOT NULL REFERENCES check_requests(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    is_prime BOOLEAN NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(request_id, position)
+);
+
 -- Index for faster lookups
 CREATE INDEX IF NOT EXISTS idx_prime_numbers_request_id ON prime_numbers(request_id);
 CREATE INDEX IF NOT EXISTS idx_requests_id ON requests(id);
+CREATE INDEX IF NOT EXISTS idx_requests_pending ON requests(status) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_check_results_request_id ON check_results(request_id);
 
 -- Function to update the updated_at timestamp
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -35,3 +61,6 @@ $$ language 'plpgsql';
 -- Trigger to automatically update updated_at
 CREATE TRIGGER update_requests_updated_at BEFORE UPDATE ON requests
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+CREATE TRIGGER update_check_requests_updated_at BEFORE UPDATE ON check_requests
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
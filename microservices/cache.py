@@ -0,0 +1,196 @@
+"""
+Cache for the responses of completed requests
+Completed requests never change, so their serialized status and result bodies
+are kept in a bounded, size-aware LRU cache in the API process, optionally
+backed by a shared Redis cache so all API replicas benefit from each other
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+import hashlib
+import logging
+import threading
+import time
+
+try:
+    import redis
+except ImportError:  # The shared backend is optional
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Approximate bookkeeping overhead of a cache entry, in bytes
+ENTRY_OVERHEAD_BYTES = 200
+
+# Expiration of entries in the shared backend, in seconds
+SHARED_TTL_SECONDS = 24 * 60 * 60
+
+# The shared backend is queried from the event loop, so it must answer quickly
+SHARED_TIMEOUT_SECONDS = 0.1
+
+# After a shared backend error, only the local cache is used for this long
+SHARED_RETRY_SECONDS = 30
+
+
+@dataclass
+class CacheEntry:
+    body: bytes
+    etag: str
+    expires_at: float
+
+    @property
+    def size(self):
+        return len(self.body) + ENTRY_OVERHEAD_BYTES
+
+
+def compute_etag(body):
+    """Compute a strong ETag for a response body"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+class RedisBackend:
+    """Shared cache backend storing response bodies in Redis"""
+
+    def __init__(self, url, prefix='primes:cache:'):
+        self.client = redis.Redis.from_url(
+            url,
+            socket_timeout=SHARED_TIMEOUT_SECONDS,
+            socket_connect_timeout=SHARED_TIMEOUT_SECONDS
+        )
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, body):
+        self.client.set(self.prefix + key, body, ex=SHARED_TTL_SECONDS)
+
+    def delete(self, keys):
+        self.client.delete(*[self.prefix + key for key in keys])
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache of serialized response bodies, limited by total size in bytes
+    Local entries expire after ttl_seconds so deletions made through another API
+    replica are eventually observed
+    """
+
+    def __init__(self, max_bytes, ttl_seconds, backend=None):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_bytes // 4
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        self.backend_retry_at = 0.0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the cached entry for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            if entry is not None:
+                self._remove(key)
+
+        if self._backend_available():
+            try:
+                body = self.backend.get(key)
+            except Exception as e:
+                self._backend_failed('get', e)
+                body = None
+            if body is not None:
+                entry = self._store(key, body)
+                with self._lock:
+                    self.shared_hits += 1
+                return entry
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, body):
+        """Cache a response body and return its entry"""
+        entry = self._store(key, body)
+        if self._backend_available():
+            try:
+                self.backend.set(key, body)
+            except Exception as e:
+                self._backend_failed('set', e)
+        return entry
+
+    def invalidate(self, *keys):
+        """Remove keys from the local cache and the shared backend"""
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._remove(key)
+        if self._backend_available():
+            try:
+                self.backend.delete(keys)
+            except Exception as e:
+                self._backend_failed('delete', e)
+
+    def stats(self):
+        """Return hit rate and memory usage statistics"""
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'shared_backend': self.backend is not None
+            }
+
+    def _backend_available(self):
+        return self.backend is not None and time.monotonic() >= self.backend_retry_at
+
+    def _backend_failed(self, operation, error):
+        """Use only the local cache for a while, so a failing backend does not slow every lookup"""
+        self.backend_retry_at = time.monotonic() + SHARED_RETRY_SECONDS
+        logger.warning(f"Shared cache {operation} failed, using local cache for {SHARED_RETRY_SECONDS}s: {error}")
+
+    def _store(self, key, body):
+        entry = CacheEntry(body=body, etag=compute_etag(body), expires_at=time.monotonic() + self.ttl_seconds)
+        if entry.size > self.max_entry_bytes:
+            # Too large to be worth evicting everything else for
+            return entry
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self.current_bytes += entry.size
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return entry
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.current_bytes -= entry.size
+
+
+def create_cache(max_bytes, ttl_seconds, backend_url=''):
+    """Create the response cache, with a shared Redis backend if configured"""
+    backend = None
+    if backend_url:
+        if redis is None:
+            logger.warning("CACHE_BACKEND_URL is set but the redis package is not installed, using local cache only")
+        else:
+            backend = RedisBackend(backend_url)
+            logger.info("Shared cache backend enabled")
+    return ResponseCache(max_bytes, ttl_seconds, backend)
@@ -18,9 +18,42 @@ RABBITMQ_PORT = os.getenv('RABBITMQ_PORT', '5672')
 RABBITMQ_USER = os.getenv('RABBITMQ_USER', 'guest')
 RABBITMQ_PASSWORD = os.getenv('RABBITMQ_PASSWORD', 'guest')
 RABBITMQ_QUEUE = os.getenv('RABBITMQ_QUEUE', 'prime_requests')
+RABBITMQ_JOBS_QUEUE = os.getenv('RABBITMQ_JOBS_QUEUE', 'prime_jobs')
 
 RABBITMQ_URL = f"amqp://{RABBITMQ_USER}:{RABBITMQ_PASSWORD}@{RABBITMQ_HOST}:{RABBITMQ_PORT}/"
 
 # API configuration
 API_HOST = os.getenv('API_HOST', '0.0.0.0')
 API_PORT = int(os.getenv('API_PORT', '8000'))
+
+# Inline generation configuration
+# Requests with quantity * digits at or below this cost are computed synchronously
+# by the API instead of being queued (0 disables the inline path)
+INLINE_COST_THRESHOLD = int(os.getenv('INLINE_COST_THRESHOLD', '120'))
+INLINE_POOL_WORKERS = int(os.getenv('INLINE_POOL_WORKERS', '2'))
+
+# Primality check configuration
+CHECK_MAX_NUMBERS = int(os.getenv('CHECK_MAX_NUMBERS', '10000'))
+CHECK_MAX_DIGITS = int(os.getenv('CHECK_MAX_DIGITS', '1000'))
+CHECK_CHUNK_SIZE = int(os.getenv('CHECK_CHUNK_SIZE', '500'))
+# Chunks are also cut at this estimated worst-case cost, so a chunk of large numbers
+# stays well within the broker heartbeat of the worker checking it
+CHECK_CHUNK_SECONDS = float(os.getenv('CHECK_CHUNK_SECONDS', '10'))
+# Batches whose estimated worst-case cost exceeds this many seconds are sent to the
+# workers even without ?queued=true, so they cannot hold the API process pool
+CHECK_INLINE_MAX_SECONDS = float(os.getenv('CHECK_INLINE_MAX_SECONDS', '2'))
+
+# Tuning configuration
+TUNING_FILE = os.getenv('TUNING_FILE', 'tuning.json')
+
+# Cache configuration for completed requests
+CACHE_MAX_BYTES = int(os.getenv('CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+CACHE_TTL_SECONDS = int(os.getenv('CACHE_TTL_SECONDS', '300'))
+# Optional shared cache, e.g. redis://redis:6379/0 (empty disables it)
+CACHE_BACKEND_URL = os.getenv('CACHE_BACKEND_URL', '')
+
+# Bulk export configuration
+# Rows read from the database per batch; each batch is encoded and streamed at once
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '10000'))
+# Exports streamed at the same time, each on its own database connection (503 beyond)
+EXPORT_MAX_CONCURRENT = int(os.getenv('EXPORT_MAX_CONCURRENT', '4'))
@@ -0,0 +1,214 @@
+"""
+Streaming bulk export of generated prime numbers
+Encodes the batches read from a server-side cursor as they arrive, so a
+result set of any size is exported without being held in memory. Formats:
+- text: one decimal prime per line
+- binary: for each prime, a 4-byte big-endian length followed by the prime as
+  a big-endian unsigned integer of that many bytes
+- parquet / arrow: a single prime_value column, uint64 when every prime fits in
+  it (up to 19 digits) and decimal strings otherwise; arrow is the IPC stream format
+"""
+import struct
+import zlib
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet and Arrow exports are optional
+    pa = None
+    pq = None
+
+try:
+    import zstandard
+except ImportError:  # zstd compression is optional
+    zstandard = None
+
+# Largest digit count whose primes always fit in an unsigned 64-bit integer
+UINT64_MAX_DIGITS = 19
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+FORMATS = {
+    'text': ('text/plain; charset=utf-8', 'txt'),
+    'binary': ('application/octet-stream', 'bin'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+COMPRESSIONS = ('none', 'gzip', 'zstd')
+
+
+class ExportError(ValueError):
+    """Raised for an export format or compression that is unknown or not installed"""
+
+
+def validate(format_name, compression):
+    """Check that the format and compression are supported and their libraries installed"""
+    if format_name not in FORMATS:
+        raise ExportError(f"Unknown format '{format_name}', expected one of: {', '.join(FORMATS)}")
+    if compression not in COMPRESSIONS:
+        raise ExportError(f"Unknown compression '{compression}', expected one of: {', '.join(COMPRESSIONS)}")
+    if format_name in ('parquet', 'arrow') and pa is None:
+        raise ExportError(f"The {format_name} format requires pyarrow, which is not installed")
+    if compression == 'zstd' and zstandard is None and format_name != 'parquet':
+        raise ExportError("zstd compression requires zstandard, which is not installed")
+
+
+def content_encoding(format_name, compression):
+    """
+    HTTP Content-Encoding of an export, or None
+    Parquet compresses its column chunks internally, so its compression is not a
+    transfer encoding and the file stays directly readable once downloaded
+    """
+    if compression == 'none' or format_name == 'parquet':
+        return None
+    return compression
+
+
+def encode_text(batches):
+    for batch in batches:
+        yield ('\n'.join(batch) + '\n').encode()
+
+
+def encode_binary(batches):
+    pack_length = struct.Struct('>I').pack
+    for batch in batches:
+        chunk = bytearray()
+        for value in batch:
+            n = int(value)
+            magnitude = n.to_bytes((n.bit_length() + 7) // 8, 'big')
+            chunk += pack_length(len(magnitude))
+            chunk += magnitude
+        yield bytes(chunk)
+
+
+class ChunkSink:
+    """Writable file-like object collecting the bytes written by pyarrow writers"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        """Return and forget the bytes written since the last drain"""
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def arrow_schema(digits):
+    value_type = pa.uint64() if digits <= UINT64_MAX_DIGITS else pa.string()
+    return pa.schema([('prime_value', value_type)])
+
+
+def arrow_batch(batch, schema):
+    value_type = schema.field('prime_value').type
+    values = [int(value) for value in batch] if pa.types.is_unsigned_integer(value_type) else batch
+    return pa.record_batch([pa.array(values, type=value_type)], schema=schema)
+
+
+def encode_arrow(batches, digits, format_name, compression):
+    schema = arrow_schema(digits)
+    sink = ChunkSink()
+    if format_name == 'parquet':
+        codec = 'none' if compression == 'none' else compression
+        # Primes are unique, dictionary encoding would only add overhead
+        writer = pq.ParquetWriter(sink, schema, compression=codec, use_dictionary=False)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+
+    # Each batch becomes a Parquet row group or an Arrow record batch
+    for batch in batches:
+        writer.write_batch(arrow_batch(batch, schema))
+        data = sink.drain()
+        if data:
+            yield data
+    writer.close()
+    yield sink.drain()
+
+
+def compress(chunks, compression):
+    """Compress a stream of chunks with gzip or zstd"""
+    if compression == 'gzip':
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    else:
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class ExportStream:
+    """
+    Iterator over the chunks of an export that holds a concurrency slot
+    The slot is released when the export ends, fails, is closed or is garbage
+    collected after the client disconnects, whichever happens first
+    """
+
+    def __init__(self, chunks, slots):
+        self.chunks = chunks
+        self.slots = slots
+        self.released = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self.chunks)
+        except BaseException:
+            self.release()
+            raise
+
+    def close(self):
+        try:
+            close = getattr(self.chunks, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            self.release()
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.slots.release()
+
+    def __del__(self):
+        self.close()
+
+
+def stream_export(batches, format_name, compression, digits):
+    """
+    Encode batches of prime values (decimal strings) in the requested format
+    Returns an iterator of bytes, compressed if requested
+    """
+    if format_name == 'text':
+        chunks = encode_text(batches)
+    elif format_name == 'binary':
+        chunks = encode_binary(batches)
+    else:
+        chunks = encode_arrow(batches, digits, format_name, compression)
+
+    if content_encoding(format_name, compression) is None:
+        return chunks
+    return compress(chunks, compression)
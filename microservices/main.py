@@ -2,17 +2,31 @@
 FastAPI Microservice for Prime Number Generation System
 Provides three endpoints: New, Status, and Result
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
 import pika
 import json
 import logging
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Optional
 import uuid
 
-from config import RABBITMQ_URL, RABBITMQ_QUEUE, API_HOST, API_PORT
+from config import (
+    RABBITMQ_URL, RABBITMQ_QUEUE, RABBITMQ_JOBS_QUEUE, API_HOST, API_PORT,
+    INLINE_COST_THRESHOLD, INLINE_POOL_WORKERS, CHECK_MAX_NUMBERS, CHECK_MAX_DIGITS,
+    CHECK_CHUNK_SIZE, CHECK_CHUNK_SECONDS, CHECK_INLINE_MAX_SECONDS,
+    TUNING_FILE, CACHE_MAX_BYTES, CACHE_TTL_SECONDS, CACHE_BACKEND_URL, EXPORT_BATCH_SIZE,
+    EXPORT_MAX_CONCURRENT
+)
 import database as db
+import export
+import tuning
+from cache import create_cache
+from prime_utils import generate_primes, check_primes
 
 # Configure logging
 logging.basicConfig(
@@ -21,13 +35,30 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Process pool for inline generation and primality checks
+process_pool = None
+
+# Cache of status and result bodies of completed requests
+response_cache = create_cache(CACHE_MAX_BYTES, CACHE_TTL_SECONDS, CACHE_BACKEND_URL)
+
+# Slots of the exports being streamed, released by the export thread when it ends
+export_slots = threading.BoundedSemaphore(EXPORT_MAX_CONCURRENT)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown events"""
+    global process_pool
+
     # Startup
     try:
         db.init_db_pool()
+        tuning.setup(TUNING_FILE)
+        process_pool = ProcessPoolExecutor(
+            max_workers=INLINE_POOL_WORKERS,
+            initializer=tuning.setup,
+            initargs=(TUNING_FILE,)
+        )
         logger.info("Application started successfully")
     except Exception as e:
         logger.error(f"Error during startup: {e}")
@@ -36,6 +67,8 @@ async def lifespan(app: FastAPI):
     yield
     
     # Shutdown
+    if process_pool:
+        process_pool.shutdown(cancel_futures=True)
     db.close_db_pool()
     logger.info("Application shutdown complete")
 
@@ -57,6 +90,8 @@ class NewRequest(BaseModel):
 class NewResponse(BaseModel):
     request_id: str
     message: str
+    status: str = 'pending'
+    prime_numbers: Optional[List[str]] = None
 
 
 class StatusResponse(BaseModel):
@@ -80,8 +115,75 @@ class ResultResponse(BaseModel):
     prime_numbers: List[str]
 
 
+class BacklogEntry(BaseModel):
+    digits: int
+    request_count: int
+    outstanding_primes: int
+    estimated_seconds: float
+
+
+class BacklogResponse(BaseModel):
+    outstanding_primes: int
+    unchecked_numbers: int
+    check_backlog_seconds: float
+    backlog_seconds: float
+    queue_depth: int
+    jobs_queue_depth: int
+    tasks_queue_depth: int
+    by_digits: List[BacklogEntry]
+
+
+class CheckResult(BaseModel):
+    value: str
+    is_prime: bool
+
+
+class CheckResponse(BaseModel):
+    request_id: Optional[str] = None
+    quantity: int
+    checked_count: int
+    status: str
+    results: List[CheckResult] = []
+
+
 def send_to_queue(request_id: str, quantity: int, digits: int):
-    """Send a request to RabbitMQ queue"""
+    """
+    Send a request to the scheduler through the RabbitMQ jobs queue
+    The scheduler splits it into one task per prime and interleaves it fairly
+    with the other requests in the workers queue
+    """
+    try:
+        connection = pika.BlockingConnection(pika.URLParameters(RABBITMQ_URL))
+        channel = connection.channel()
+        
+        # Declare queue (idempotent)
+        channel.queue_declare(queue=RABBITMQ_JOBS_QUEUE, durable=True)
+        
+        message = {
+            'request_id': request_id,
+            'digits': digits,
+            'quantity': quantity,
+            'cost': tuning.estimate_prime_seconds(digits)
+        }
+        
+        channel.basic_publish(
+            exchange='',
+            routing_key=RABBITMQ_JOBS_QUEUE,
+            body=json.dumps(message),
+            properties=pika.BasicProperties(
+                delivery_mode=2,  # Make message persistent
+            )
+        )
+        
+        connection.close()
+        logger.info(f"Sent job for {quantity} primes to scheduler for request {request_id}")
+    except Exception as e:
+        logger.error(f"Error sending to queue: {e}")
+        raise
+
+
+def send_checks_to_queue(request_id: str, numbers: List[int]):
+    """Send a primality check request to RabbitMQ queue in chunks"""
     try:
         connection = pika.BlockingConnection(pika.URLParameters(RABBITMQ_URL))
         channel = connection.channel()
@@ -89,13 +191,13 @@ def send_to_queue(request_id: str, quantity: int, digits: int):
         # Declare queue (idempotent)
         channel.queue_declare(queue=RABBITMQ_QUEUE, durable=True)
         
-        # Send individual messages for each prime to generate
-        for i in range(quantity):
+        for offset, chunk in split_check_chunks(numbers):
             message = {
+                'type': 'check',
                 'request_id': request_id,
-                'digits': digits,
-                'index': i + 1,
-                'total': quantity
+                'offset': offset,
+                'numbers': [str(n) for n in chunk],
+                'total': len(numbers)
             }
             
             channel.basic_publish(
@@ -108,27 +210,149 @@ def send_to_queue(request_id: str, quantity: int, digits: int):
             )
         
         connection.close()
-        logger.info(f"Sent {quantity} messages to queue for request {request_id}")
+        logger.info(f"Sent {len(numbers)} numbers to queue for check request {request_id}")
     except Exception as e:
-        logger.error(f"Error sending to queue: {e}")
+        logger.error(f"Error sending checks to queue: {e}")
         raise
 
 
+def cached_response(request: Request, entry) -> Response:
+    """Build a JSON response for a cache entry, or a 304 if the client already has it"""
+    if_none_match = request.headers.get('if-none-match', '')
+    client_etags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    if entry.etag in client_etags or '*' in client_etags:
+        return Response(status_code=304, headers={'ETag': entry.etag})
+    return Response(content=entry.body, media_type='application/json', headers={'ETag': entry.etag})
+
+
+def invalidate_request_cache(request_id: str):
+    """Drop the cached responses of a request"""
+    response_cache.invalidate(f"status:{request_id}", f"result:{request_id}")
+
+
+def get_queue_depths() -> Dict[str, int]:
+    """
+    Get the number of messages waiting in the jobs queue and in the worker queue
+    The scheduler keeps the worker queue shallow, so pending requests wait as jobs
+    """
+    connection = pika.BlockingConnection(pika.URLParameters(RABBITMQ_URL))
+    try:
+        channel = connection.channel()
+        
+        # Declare queues (idempotent)
+        jobs = channel.queue_declare(queue=RABBITMQ_JOBS_QUEUE, durable=True)
+        tasks = channel.queue_declare(queue=RABBITMQ_QUEUE, durable=True)
+        return {'jobs': jobs.method.message_count, 'tasks': tasks.method.message_count}
+    finally:
+        connection.close()
+
+
+def parse_check_numbers(body: bytes, content_type: str) -> List[int]:
+    """Parse a JSON array or newline-delimited body into a list of integers"""
+    try:
+        if content_type.startswith('application/json'):
+            values = json.loads(body)
+            if not isinstance(values, list):
+                raise ValueError("expected a JSON array")
+        else:
+            values = [line.strip() for line in body.decode().splitlines() if line.strip()]
+        
+        numbers = []
+        for value in values:
+            if isinstance(value, bool) or not isinstance(value, (int, str)):
+                raise ValueError(f"invalid number {value!r}")
+            numbers.append(int(value))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid numbers: {e}")
+    
+    # Checking a prime costs ~digits^2.2 per round, so the size of each number is bounded too
+    limit = 10 ** CHECK_MAX_DIGITS
+    if any(abs(n) >= limit for n in numbers):
+        raise HTTPException(status_code=400, detail=f"Numbers can have at most {CHECK_MAX_DIGITS} digits")
+    return numbers
+
+
+def count_digits(n: int) -> int:
+    """Approximate number of decimal digits of n, without converting it to a string"""
+    return int(abs(n).bit_length() * 0.30103) + 1
+
+
+def estimate_check_costs(numbers: List[int]) -> List[float]:
+    """Estimated worst-case seconds to check each number, as if it were prime"""
+    seconds_by_digits = {}
+    costs = []
+    for n in numbers:
+        digits = count_digits(n)
+        if digits not in seconds_by_digits:
+            seconds_by_digits[digits] = tuning.estimate_check_seconds(digits)
+        costs.append(seconds_by_digits[digits])
+    return costs
+
+
+def estimate_check_cost(numbers: List[int]) -> float:
+    """Estimated worst-case seconds to check a batch"""
+    return sum(estimate_check_costs(numbers))
+
+
+def split_check_chunks(numbers: List[int]) -> List[tuple]:
+    """
+    Split a batch into (offset, numbers) chunks of at most CHECK_CHUNK_SIZE numbers
+    and CHECK_CHUNK_SECONDS of estimated cost (a single number may exceed it)
+    """
+    chunks = []
+    start = 0
+    chunk_cost = 0.0
+    for i, cost in enumerate(estimate_check_costs(numbers)):
+        if i > start and (i - start >= CHECK_CHUNK_SIZE or chunk_cost + cost > CHECK_CHUNK_SECONDS):
+            chunks.append((start, numbers[start:i]))
+            start = i
+            chunk_cost = 0.0
+        chunk_cost += cost
+    chunks.append((start, numbers[start:]))
+    return chunks
+
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
     return {"status": "healthy", "service": "Prime Number Generation Microservice"}
 
 
-@app.post("/api/new", response_model=NewResponse)
+def is_inline_request(quantity: int, digits: int) -> bool:
+    """Check whether a request is cheap enough to be computed inline"""
+    return quantity * digits <= INLINE_COST_THRESHOLD
+
+
+@app.post("/api/new", response_model=NewResponse, response_model_exclude_none=True)
 async def new_request(request: NewRequest):
     """
     Create a new prime number generation request
     
     - **quantity**: Number of prime numbers to generate
     - **digits**: Number of digits for each prime number (minimum 12)
+    
+    Small requests (quantity x digits below INLINE_COST_THRESHOLD) are computed
+    synchronously and returned with status `completed` and their prime numbers.
     """
     try:
+        if is_inline_request(request.quantity, request.digits):
+            # Generate off the event loop, then persist request and primes in one batch
+            loop = asyncio.get_running_loop()
+            primes = await loop.run_in_executor(
+                process_pool, generate_primes, request.quantity, request.digits
+            )
+            db_request = db.create_completed_request(request.quantity, request.digits, primes)
+            request_id = str(db_request['id'])
+            
+            logger.info(f"Completed inline request {request_id} for {request.quantity} primes with {request.digits} digits")
+            
+            return NewResponse(
+                request_id=request_id,
+                message=f"Request completed. Generated {request.quantity} prime numbers with {request.digits} digits.",
+                status='completed',
+                prime_numbers=[str(p) for p in primes]
+            )
+        
         # Create request in database
         db_request = db.create_request(request.quantity, request.digits)
         request_id = str(db_request['id'])
@@ -148,19 +372,26 @@ async def new_request(request: NewRequest):
 
 
 @app.get("/api/status/{request_id}", response_model=StatusResponse)
-async def get_status(request_id: str):
+async def get_status(request_id: str, request: Request):
     """
     Get the status of a prime generation request
     
     - **request_id**: The UUID of the request
+    
+    Completed requests are served from cache with an ETag (If-None-Match returns 304)
     """
     try:
         # Validate UUID format
         try:
-            uuid.UUID(request_id)
+            request_id = str(uuid.UUID(request_id))
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid request_id format")
         
+        cache_key = f"status:{request_id}"
+        entry = response_cache.get(cache_key)
+        if entry:
+            return cached_response(request, entry)
+        
         status_data = db.get_request_status(request_id)
         
         if not status_data:
@@ -171,17 +402,22 @@ async def get_status(request_id: str):
         progress = (generated_count / quantity * 100) if quantity > 0 else 0
         
         # Update status if complete
-        if generated_count >= quantity and status_data['status'] != 'completed':
+        if generated_count >= quantity and status_data['status'] == 'pending':
             db.update_request_status(request_id, 'completed')
             status_data['status'] = 'completed'
         
-        return StatusResponse(
+        response = StatusResponse(
             request_id=request_id,
             quantity=quantity,
             generated_count=generated_count,
             status=status_data['status'],
             progress_percentage=round(progress, 2)
         )
+        
+        if response.status == 'completed':
+            entry = response_cache.set(cache_key, response.model_dump_json().encode())
+            return cached_response(request, entry)
+        return response
     except HTTPException:
         raise
     except Exception as e:
@@ -190,19 +426,26 @@ async def get_status(request_id: str):
 
 
 @app.get("/api/result/{request_id}", response_model=ResultResponse)
-async def get_result(request_id: str):
+async def get_result(request_id: str, request: Request):
     """
     Get the generated prime numbers for a request
     
     - **request_id**: The UUID of the request
+    
+    Completed requests are served from cache with an ETag (If-None-Match returns 304)
     """
     try:
         # Validate UUID format
         try:
-            uuid.UUID(request_id)
+            request_id = str(uuid.UUID(request_id))
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid request_id format")
         
+        cache_key = f"result:{request_id}"
+        entry = response_cache.get(cache_key)
+        if entry:
+            return cached_response(request, entry)
+        
         status_data = db.get_request_status(request_id)
         
         if not status_data:
@@ -210,13 +453,18 @@ async def get_result(request_id: str):
         
         prime_numbers = db.get_request_results(request_id)
         
-        return ResultResponse(
+        response = ResultResponse(
             request_id=request_id,
             quantity=status_data['quantity'],
             generated_count=status_data['generated_count'],
             status=status_data['status'],
             prime_numbers=[p['prime_value'] for p in prime_numbers]
         )
+        
+        if response.status == 'completed':
+            entry = response_cache.set(cache_key, response.model_dump_json().encode())
+            return cached_response(request, entry)
+        return response
     except HTTPException:
         raise
     except Exception as e:
@@ -224,6 +472,264 @@ async def get_result(request_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/result/{request_id}/export")
+async def export_result(
+    request_id: str,
+    format_name: str = Query('text', alias='format'),
+    compression: str = 'none'
+):
+    """
+    Stream the generated prime numbers of a request in a compact format
+    
+    - **request_id**: The UUID of the request
+    - **format**: text (one prime per line), binary (4-byte big-endian length + big-endian
+      integer per prime), parquet or arrow (IPC stream)
+    - **compression**: none, gzip or zstd (sent as Content-Encoding; inside the file for parquet)
+    """
+    try:
+        # Validate UUID format
+        try:
+            request_id = str(uuid.UUID(request_id))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid request_id format")
+        
+        try:
+            export.validate(format_name, compression)
+        except export.ExportError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        status_data = db.get_request_status(request_id)
+        
+        if not status_data:
+            raise HTTPException(status_code=404, detail="Request not found")
+        
+        if not export_slots.acquire(blocking=False):
+            raise HTTPException(status_code=503, detail="Too many exports in progress, retry later")
+        
+        media_type, extension = export.FORMATS[format_name]
+        headers = {
+            'Content-Disposition': f'attachment; filename="{request_id}.{extension}"',
+            'X-Generated-Count': str(status_data['generated_count']),
+            'X-Request-Status': status_data['status']
+        }
+        encoding = export.content_encoding(format_name, compression)
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        
+        # The generator is iterated in a thread pool, rows are encoded as they are read
+        batches = db.iter_request_results(request_id, EXPORT_BATCH_SIZE)
+        chunks = export.stream_export(batches, format_name, compression, status_data['digits'])
+        return StreamingResponse(
+            export.ExportStream(chunks, export_slots),
+            media_type=media_type,
+            headers=headers
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error exporting results for request {request_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/cancel/{request_id}")
+async def cancel_request(request_id: str):
+    """
+    Cancel a pending prime generation request
+    
+    - **request_id**: The UUID of the request
+    """
+    try:
+        # Validate UUID format
+        try:
+            request_id = str(uuid.UUID(request_id))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid request_id format")
+        
+        if not db.cancel_request(request_id):
+            status = db.get_request_state(request_id)
+            if status is None:
+                raise HTTPException(status_code=404, detail="Request not found")
+            raise HTTPException(status_code=409, detail=f"Request is already {status}")
+        
+        invalidate_request_cache(request_id)
+        logger.info(f"Cancelled request {request_id}")
+        
+        return {"request_id": request_id, "status": "cancelled"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error cancelling request {request_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.delete("/api/request/{request_id}")
+async def delete_request(request_id: str):
+    """
+    Delete a prime generation request and its generated prime numbers
+    
+    - **request_id**: The UUID of the request
+    """
+    try:
+        # Validate UUID format
+        try:
+            request_id = str(uuid.UUID(request_id))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid request_id format")
+        
+        if not db.delete_request(request_id):
+            raise HTTPException(status_code=404, detail="Request not found")
+        
+        invalidate_request_cache(request_id)
+        logger.info(f"Deleted request {request_id}")
+        
+        return {"request_id": request_id, "status": "deleted"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error deleting request {request_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Get hit rate and memory usage of the completed request cache"""
+    return response_cache.stats()
+
+
+@app.get("/api/metrics/backlog", response_model=BacklogResponse)
+async def get_backlog():
+    """
+    Get the cost-weighted backlog of pending requests, used as the worker autoscaling signal
+    
+    - **check_backlog_seconds**: Estimated seconds of the numbers still to be checked in queued check batches
+    - **backlog_seconds**: Outstanding primes weighted by the estimated generation cost of their digit count,
+      plus check_backlog_seconds
+    - **queue_depth**: Messages waiting in both queues
+    - **jobs_queue_depth**: Requests waiting for the scheduler (jobs it is dispatching are not counted)
+    - **tasks_queue_depth**: Prime tasks waiting for the workers, kept near SCHEDULER_TARGET_DEPTH
+    """
+    try:
+        entries = []
+        for row in db.get_pending_backlog():
+            outstanding = int(row['outstanding'])
+            entries.append(BacklogEntry(
+                digits=row['digits'],
+                request_count=row['request_count'],
+                outstanding_primes=outstanding,
+                estimated_seconds=round(outstanding * tuning.estimate_prime_seconds(row['digits']), 3)
+            ))
+        
+        checks = db.get_pending_check_backlog()
+        check_seconds = float(checks['estimated_seconds'])
+        
+        depths = get_queue_depths()
+        return BacklogResponse(
+            outstanding_primes=sum(e.outstanding_primes for e in entries),
+            unchecked_numbers=int(checks['unchecked']),
+            check_backlog_seconds=round(check_seconds, 3),
+            backlog_seconds=round(sum(e.estimated_seconds for e in entries) + check_seconds, 3),
+            queue_depth=depths['jobs'] + depths['tasks'],
+            jobs_queue_depth=depths['jobs'],
+            tasks_queue_depth=depths['tasks'],
+            by_digits=entries
+        )
+    except Exception as e:
+        logger.error(f"Error getting backlog: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/check", response_model=CheckResponse, response_model_exclude_none=True)
+async def check_numbers(request: Request, queued: bool = False):
+    """
+    Check the primality of a batch of numbers
+    
+    - **body**: JSON array of integers, or one integer per line
+    - **queued**: Send the batch to the workers and return a request_id to poll
+    
+    Batches estimated to take more than CHECK_INLINE_MAX_SECONDS are always queued
+    """
+    numbers = parse_check_numbers(await request.body(), request.headers.get('content-type', ''))
+    
+    if not numbers:
+        raise HTTPException(status_code=400, detail="No numbers to check")
+    if len(numbers) > CHECK_MAX_NUMBERS:
+        raise HTTPException(status_code=400, detail=f"At most {CHECK_MAX_NUMBERS} numbers can be checked per request")
+    
+    try:
+        cost = estimate_check_cost(numbers)
+        if queued or cost > CHECK_INLINE_MAX_SECONDS:
+            db_request = db.create_check_request(len(numbers), cost)
+            request_id = str(db_request['id'])
+            send_checks_to_queue(request_id, numbers)
+            
+            logger.info(f"Created check request {request_id} for {len(numbers)} numbers")
+            
+            return CheckResponse(
+                request_id=request_id,
+                quantity=len(numbers),
+                checked_count=0,
+                status='pending'
+            )
+        
+        # Fan the batch out to the process pool in chunks
+        loop = asyncio.get_running_loop()
+        chunks = [chunk for _, chunk in split_check_chunks(numbers)]
+        chunk_verdicts = await asyncio.gather(*[
+            loop.run_in_executor(process_pool, check_primes, chunk) for chunk in chunks
+        ])
+        verdicts = [verdict for chunk in chunk_verdicts for verdict in chunk]
+        
+        return CheckResponse(
+            quantity=len(numbers),
+            checked_count=len(numbers),
+            status='completed',
+            results=[CheckResult(value=str(n), is_prime=v) for n, v in zip(numbers, verdicts)]
+        )
+    except Exception as e:
+        logger.error(f"Error checking numbers: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/check/{request_id}", response_model=CheckResponse)
+async def get_check(request_id: str):
+    """
+    Get the status and verdicts of a queued primality check request
+    
+    - **request_id**: The UUID of the check request
+    """
+    try:
+        # Validate UUID format
+        try:
+            uuid.UUID(request_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid request_id format")
+        
+        status_data = db.get_check_request_status(request_id)
+        
+        if not status_data:
+            raise HTTPException(status_code=404, detail="Check request not found")
+        
+        # Update status if complete
+        if status_data['checked_count'] >= status_data['quantity'] and status_data['status'] != 'completed':
+            db.update_check_request_status(request_id, 'completed')
+            status_data['status'] = 'completed'
+        
+        results = db.get_check_results(request_id)
+        
+        return CheckResponse(
+            request_id=request_id,
+            quantity=status_data['quantity'],
+            checked_count=status_data['checked_count'],
+            status=status_data['status'],
+            results=[CheckResult(value=r['value'], is_prime=r['is_prime']) for r in results]
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting check request {request_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host=API_HOST, port=API_PORT)
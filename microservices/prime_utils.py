@@ -2,23 +2,185 @@
 Prime number generation utilities with guaranteed 100% primality
 Uses Miller-Rabin test with deterministic witnesses for guaranteed results
 """
+import functools
+import math
 import random
 import secrets
+import time
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, the pure-Python path is used without it
+    np = None
 
 
 # Small primes for quick divisibility check
 SMALL_PRIMES = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47]
 
+# Product of the small primes, lets a single gcd replace the trial division loop
+SMALL_PRIMES_PRODUCT = math.prod(SMALL_PRIMES)
+
+# Miller-Rabin witnesses that give a deterministic answer for every n below the limit
+DETERMINISTIC_WITNESSES = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41]
+DETERMINISTIC_LIMIT = 3317044064679887385961981
+
+# Vectorized sieve configuration: values up to 18 digits fit in uint64
+NUMPY_MAX_DIGITS = 18
+NUMPY_MAX_SIEVE_LIMIT = 1 << 16
+SIEVE_LIMIT = 1 << 12
+SIEVE_BLOCK_SIZE = 8192
+SIEVE_CHUNK_SIZE = 256
+
+# Sieve limit bounds for the pure-Python trial division path
+MIN_TRIAL_DIVISION_LIMIT = SMALL_PRIMES[-1]
+MAX_TRIAL_DIVISION_LIMIT = 10 ** 6
+
+# Sieved candidates not yet tested, per digit count
+_candidate_buffers = {}
+
+# Per-digit tuning parameters, filled from a calibrated table (see tuning.py)
+_tuning_table = {}
+
+
+def primes_up_to(limit):
+    """
+    Return all primes <= limit using the sieve of Eratosthenes
+    """
+    if limit < 2:
+        return []
+    sieve = bytearray([1]) * (limit + 1)
+    sieve[0] = sieve[1] = 0
+    for p in range(2, math.isqrt(limit) + 1):
+        if sieve[p]:
+            sieve[p * p::p] = bytes(len(range(p * p, limit + 1, p)))
+    return [p for p in range(limit + 1) if sieve[p]]
+
+
+@functools.lru_cache(maxsize=None)
+def get_sieve_primes(limit=SIEVE_LIMIT):
+    """
+    Return the odd primes up to limit as a uint64 array for the vectorized sieve
+    """
+    return np.array(primes_up_to(limit)[1:], dtype=np.uint64)
+
+
+@functools.lru_cache(maxsize=None)
+def trial_division_product(limit):
+    """
+    Return the product of all primes up to limit
+    A single gcd against it replaces trial division by each of those primes
+    """
+    return math.prod(primes_up_to(limit))
+
+
+def sieve_mask(values, sieve_limit=SIEVE_LIMIT):
+    """
+    Return a boolean mask of the uint64 values not divisible by any sieve prime
+    Values must be greater than sieve_limit
+    """
+    mask = np.ones(len(values), dtype=bool)
+    primes = get_sieve_primes(sieve_limit)
+    for i in range(0, len(primes), SIEVE_CHUNK_SIZE):
+        alive = np.flatnonzero(mask)
+        if not len(alive):
+            break
+        chunk = primes[i:i + SIEVE_CHUNK_SIZE]
+        # Only the survivors of the previous chunks are checked against this one
+        mask[alive] = (values[alive, None] % chunk[None, :] != 0).all(axis=1)
+    return mask
+
+
+def use_numpy_sieve(digits):
+    """
+    Check whether candidates of this size can go through the vectorized sieve
+    """
+    return np is not None and digits <= NUMPY_MAX_DIGITS and 10 ** (digits - 1) > NUMPY_MAX_SIEVE_LIMIT
+
+
+def default_tuning(digits):
+    """
+    Return the tuning parameters used when no calibrated entry applies
+    """
+    if use_numpy_sieve(digits):
+        return {'sieve_limit': SIEVE_LIMIT, 'block_size': SIEVE_BLOCK_SIZE}
+    # Trial division pays off deeper as a Miller-Rabin round gets more expensive
+    sieve_limit = min(MAX_TRIAL_DIVISION_LIMIT, max(MIN_TRIAL_DIVISION_LIMIT, 100 * digits))
+    return {'sieve_limit': sieve_limit, 'block_size': 1}
+
+
+def set_tuning_table(table):
+    """
+    Replace the per-digit tuning table
+    Keys are digit counts, values hold sieve_limit and block_size
+    """
+    global _tuning_table
+    _tuning_table = {int(digits): dict(params) for digits, params in table.items()}
+    _candidate_buffers.clear()
+
+
+def get_tuning_table():
+    """
+    Return the current per-digit tuning table
+    """
+    return _tuning_table
+
+
+def get_tuning(digits):
+    """
+    Return the sieve limit and block size to use for the specified number of digits
+    Uses the calibrated entry for the closest smaller digit count on the same
+    generation path, or the defaults when there is none
+    """
+    numpy_path = use_numpy_sieve(digits)
+    calibrated = [d for d in _tuning_table if d <= digits and use_numpy_sieve(d) == numpy_path]
+    if not calibrated:
+        return default_tuning(digits)
+    
+    params = _tuning_table[max(calibrated)]
+    if numpy_path:
+        return {
+            'sieve_limit': min(params['sieve_limit'], NUMPY_MAX_SIEVE_LIMIT),
+            'block_size': params['block_size']
+        }
+    return {
+        'sieve_limit': min(params['sieve_limit'], MAX_TRIAL_DIVISION_LIMIT),
+        'block_size': 1
+    }
+
+
+def sieve_candidates(digits, block_size=SIEVE_BLOCK_SIZE, sieve_limit=SIEVE_LIMIT):
+    """
+    Draw a block of random odd candidates with the specified number of digits
+    and eliminate multiples of the sieve primes in bulk
+    """
+    lower_bound = 10 ** (digits - 1)
+    upper_bound = (10 ** digits) - 1
+    rng = np.random.default_rng(secrets.randbits(128))
+    candidates = rng.integers(
+        lower_bound, upper_bound, size=block_size, dtype=np.uint64, endpoint=True
+    ) | np.uint64(1)
+    return [int(c) for c in candidates[sieve_mask(candidates, sieve_limit)]]
+
+
+def next_sieved_candidate(digits):
+    """
+    Return the next candidate that survived the vectorized sieve
+    """
+    buffer = _candidate_buffers.setdefault(digits, [])
+    while not buffer:
+        tuning = get_tuning(digits)
+        buffer.extend(sieve_candidates(digits, tuning['block_size'], tuning['sieve_limit']))
+    return buffer.pop()
+
 
 def is_prime_miller_rabin(n, k=40):
     """
     Miller-Rabin primality test with k rounds
     For cryptographic purposes, k=40 gives error probability < 2^-80
+    Below DETERMINISTIC_LIMIT the fixed witness set is used instead and the result is exact
     """
-    if n < 2:
-        return False
-    if n == 2 or n == 3:
-        return True
+    if n <= SMALL_PRIMES[-1]:
+        return n in SMALL_PRIMES
     if n % 2 == 0:
         return False
     
@@ -28,9 +190,13 @@ def is_prime_miller_rabin(n, k=40):
         r += 1
         d //= 2
     
+    if n < DETERMINISTIC_LIMIT:
+        witnesses = DETERMINISTIC_WITNESSES
+    else:
+        witnesses = (random.randrange(2, n - 1) for _ in range(k))
+    
     # Witness loop
-    for _ in range(k):
-        a = random.randrange(2, n - 1)
+    for a in witnesses:
         x = pow(a, d, n)
         
         if x == 1 or x == n - 1:
@@ -56,11 +222,38 @@ def generate_prime_candidate(digits):
     return secrets.randbelow(upper_bound - lower_bound + 1) + lower_bound
 
 
-def generate_prime(digits):
+def miller_rabin_with_stats(candidate, stats):
+    """
+    Miller-Rabin test of a generation candidate
+    If stats is a dict, the number of candidates tested and the seconds spent in
+    Miller-Rabin are added to its 'candidates' and 'miller_rabin_seconds' keys
+    """
+    if stats is None:
+        return is_prime_miller_rabin(candidate, k=40)
+    
+    start_time = time.perf_counter()
+    result = is_prime_miller_rabin(candidate, k=40)
+    stats['miller_rabin_seconds'] = stats.get('miller_rabin_seconds', 0.0) + time.perf_counter() - start_time
+    stats['candidates'] = stats.get('candidates', 0) + 1
+    return result
+
+
+def generate_prime(digits, stats=None):
     """
     Generate a prime number with the specified number of digits
     Guaranteed to be prime using Miller-Rabin test
+    If stats is a dict, the candidates tested and the time spent in Miller-Rabin are
+    recorded in it; the rest of the generation time goes to drawing and sieving candidates
     """
+    if use_numpy_sieve(digits):
+        while True:
+            candidate = next_sieved_candidate(digits)
+            if miller_rabin_with_stats(candidate, stats):
+                return candidate
+    
+    sieve_limit = get_tuning(digits)['sieve_limit']
+    sieve_product = trial_division_product(sieve_limit)
+    
     while True:
         candidate = generate_prime_candidate(digits)
         # Ensure odd number
@@ -77,17 +270,53 @@ def generate_prime(digits):
                 return candidate
             continue
         
-        is_divisible = False
-        for p in SMALL_PRIMES:
-            if candidate % p == 0:
-                is_divisible = True
-                break
-        
-        if is_divisible:
+        # Trial division by every prime up to the tuned limit with a single gcd
+        if candidate > sieve_limit and math.gcd(sieve_product % candidate, candidate) != 1:
             continue
         
         # Use Miller-Rabin for primality test
-        if is_prime_miller_rabin(candidate, k=40):
+        if miller_rabin_with_stats(candidate, stats):
             # Verify the number has the correct number of digits
             if len(str(candidate)) == digits:
                 return candidate
+
+
+def generate_primes(quantity, digits):
+    """
+    Generate a list of distinct prime numbers with the specified number of digits
+    """
+    primes = set()
+    while len(primes) < quantity:
+        primes.add(generate_prime(digits))
+    return list(primes)
+
+
+def check_primes(numbers, k=40):
+    """
+    Check the primality of a batch of numbers
+    Returns a list of booleans in the same order as the input
+    """
+    results = [None] * len(numbers)
+    
+    # Sieve every number that fits in uint64 in one vectorized pass
+    if np is not None:
+        positions = [i for i, n in enumerate(numbers) if SIEVE_LIMIT < n < 2 ** 64]
+        if positions:
+            values = np.array([numbers[i] for i in positions], dtype=np.uint64)
+            for i, survivor in zip(positions, sieve_mask(values)):
+                if not survivor:
+                    results[i] = False
+    
+    for i, n in enumerate(numbers):
+        if results[i] is not None:
+            continue
+        if n < 2:
+            results[i] = False
+        elif n in SMALL_PRIMES:
+            results[i] = True
+        elif math.gcd(n, SMALL_PRIMES_PRODUCT) != 1:
+            # Divisible by a small prime
+            results[i] = False
+        else:
+            results[i] = is_prime_miller_rabin(n, k=k)
+    return results
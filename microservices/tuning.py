@@ -0,0 +1,223 @@
+"""
+Per-digit auto-tuning of the prime generation parameters
+Measures the cost of trial division against a Miller-Rabin round for a set of
+digit sizes and keeps the sieve limit and block size that minimize the
+expected cost per prime. The table is persisted as JSON and loaded by prime_utils.
+
+Usage: python tuning.py [--output tuning.json] [--digits 12 18 100 ...]
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import time
+
+import prime_utils
+
+logger = logging.getLogger(__name__)
+
+# Digit sizes measured by default, covering the usual request mix
+DEFAULT_DIGIT_SIZES = [12, 15, 18, 25, 50, 100, 200, 300, 500, 1000]
+
+# Parameter grids explored for each generation path
+NUMPY_SIEVE_LIMITS = [256, 1024, 4096, 16384, 65536]
+NUMPY_BLOCK_SIZES = [1024, 4096, 16384]
+TRIAL_DIVISION_LIMITS = [47, 1000, 10000, 100000, 1000000]
+
+# Minimum wall time spent on each measurement
+MEASURE_SECONDS = 0.05
+
+# Cost model used outside the calibrated points: seconds per 12-digit prime,
+# growing with this power of the digit count
+BASE_PRIME_SECONDS = 0.00025
+PRIME_COST_EXPONENT = 2.5
+
+# Same for a single Miller-Rabin round
+BASE_ROUND_SECONDS = 0.000012
+ROUND_COST_EXPONENT = 2.2
+
+
+def random_odd(digits):
+    """Return a random odd number with the specified number of digits"""
+    return prime_utils.generate_prime_candidate(digits) | 1
+
+
+def measure(func, *args):
+    """Return the average wall time of func(*args), repeating it for at least MEASURE_SECONDS"""
+    calls = 0
+    start_time = time.perf_counter()
+    while True:
+        func(*args)
+        calls += 1
+        elapsed = time.perf_counter() - start_time
+        if elapsed >= MEASURE_SECONDS:
+            return elapsed / calls
+
+
+def measure_round_cost(digits):
+    """Measure the cost of a single Miller-Rabin round on a random odd number"""
+    n = random_odd(digits)
+    a = random.randrange(2, n - 1)
+    return measure(pow, a, n - 1, n)
+
+
+def measure_filter_cost(digits, sieve_limit, block_size):
+    """Measure the cost per candidate of trial division up to sieve_limit"""
+    if prime_utils.use_numpy_sieve(digits):
+        # Build the sieve primes outside of the measurement
+        prime_utils.get_sieve_primes(sieve_limit)
+        return measure(prime_utils.sieve_candidates, digits, block_size, sieve_limit) / block_size
+
+    product = prime_utils.trial_division_product(sieve_limit)
+    candidates = [random_odd(digits) for _ in range(16)]
+
+    def trial_divide():
+        for candidate in candidates:
+            math.gcd(product % candidate, candidate)
+
+    return measure(trial_divide) / len(candidates)
+
+
+def survival_fraction(sieve_limit):
+    """Fraction of odd numbers with no odd prime factor up to sieve_limit"""
+    return math.prod(1 - 1 / p for p in prime_utils.primes_up_to(sieve_limit)[1:])
+
+
+def miller_rabin_rounds(digits):
+    """Number of Miller-Rabin rounds needed to confirm a prime with the specified number of digits"""
+    if 10 ** digits <= prime_utils.DETERMINISTIC_LIMIT:
+        return len(prime_utils.DETERMINISTIC_WITNESSES)
+    return 40
+
+
+def calibrate(digit_sizes=DEFAULT_DIGIT_SIZES):
+    """
+    Measure every digit size and return the tuning table
+    Each entry holds the chosen sieve_limit and block_size, the measured cost of a
+    Miller-Rabin round and the estimated cost of generating one prime, in seconds
+    """
+    table = {}
+    for digits in digit_sizes:
+        round_seconds = measure_round_cost(digits)
+
+        if prime_utils.use_numpy_sieve(digits):
+            grid = [(limit, size) for limit in NUMPY_SIEVE_LIMITS for size in NUMPY_BLOCK_SIZES]
+        else:
+            grid = [(limit, 1) for limit in TRIAL_DIVISION_LIMITS]
+
+        # Expected cost per candidate: trial division, plus one round for each survivor
+        best = None
+        for sieve_limit, block_size in grid:
+            cost = (measure_filter_cost(digits, sieve_limit, block_size)
+                    + survival_fraction(sieve_limit) * round_seconds)
+            if best is None or cost < best[0]:
+                best = (cost, sieve_limit, block_size)
+        candidate_seconds, sieve_limit, block_size = best
+
+        # Odd candidates tried per prime found, from the prime number theorem,
+        # plus the remaining rounds that confirm the prime
+        candidates_per_prime = digits * math.log(10) / 2
+        prime_seconds = candidates_per_prime * candidate_seconds + (miller_rabin_rounds(digits) - 1) * round_seconds
+
+        table[digits] = {
+            'sieve_limit': sieve_limit,
+            'block_size': block_size,
+            'round_seconds': round_seconds,
+            'prime_seconds': prime_seconds
+        }
+        logger.info(
+            f"Calibrated {digits} digits: sieve_limit={sieve_limit} block_size={block_size} "
+            f"round={round_seconds * 1e6:.1f}us prime={prime_seconds * 1e3:.2f}ms"
+        )
+    return table
+
+
+def estimate_prime_seconds(digits):
+    """
+    Estimate the seconds needed to generate one prime with the specified number of digits
+    Scales the closest calibrated entry, or the base cost model when there is none
+    """
+    table = prime_utils.get_tuning_table()
+    calibrated = [d for d, params in table.items() if 'prime_seconds' in params]
+    if not calibrated:
+        return BASE_PRIME_SECONDS * (digits / 12) ** PRIME_COST_EXPONENT
+
+    closest = min(calibrated, key=lambda d: abs(math.log(digits / d)))
+    return table[closest]['prime_seconds'] * (digits / closest) ** PRIME_COST_EXPONENT
+
+
+def estimate_check_seconds(digits):
+    """
+    Estimate the worst-case seconds needed to check the primality of one number
+    with the specified number of digits, that of a prime, which goes through every round
+    """
+    table = prime_utils.get_tuning_table()
+    calibrated = [d for d, params in table.items() if 'round_seconds' in params]
+    if calibrated:
+        closest = min(calibrated, key=lambda d: abs(math.log(max(digits, 1) / d)))
+        round_seconds = table[closest]['round_seconds'] * (max(digits, 1) / closest) ** ROUND_COST_EXPONENT
+    else:
+        round_seconds = BASE_ROUND_SECONDS * (max(digits, 1) / 12) ** ROUND_COST_EXPONENT
+    return miller_rabin_rounds(digits) * round_seconds
+
+
+def save_table(table, path):
+    """Persist a tuning table as JSON"""
+    with open(path, 'w') as f:
+        json.dump({str(digits): params for digits, params in sorted(table.items())}, f, indent=2)
+    logger.info(f"Tuning table saved to {path}")
+
+
+def load_table(path):
+    """Load a tuning table from JSON and apply it to prime_utils, or return None if missing"""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        table = {int(digits): params for digits, params in json.load(f).items()}
+    prime_utils.set_tuning_table(table)
+    logger.info(f"Tuning table loaded from {path} ({len(table)} digit sizes)")
+    return table
+
+
+def setup(path, calibrate_if_missing=False):
+    """
+    Load the tuning table, calibrating and saving it first if it is missing and requested
+    Tuning is an optimization, so failures are logged and the defaults are kept
+    """
+    try:
+        table = load_table(path)
+        if table is None and calibrate_if_missing:
+            logger.info("No tuning table found, calibrating...")
+            table = calibrate()
+            prime_utils.set_tuning_table(table)
+            try:
+                save_table(table, path)
+            except Exception as e:
+                # The calibration stays in use for this process, only the next start loses it
+                logger.error(f"Error saving tuning table to {path}: {e}")
+        return table
+    except Exception as e:
+        logger.error(f"Error setting up tuning table: {e}")
+        return None
+
+
+def main():
+    """Calibration command"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    parser = argparse.ArgumentParser(description="Calibrate prime generation parameters per digit count")
+    parser.add_argument('--output', default=os.getenv('TUNING_FILE', 'tuning.json'),
+                        help="Path of the tuning table to write")
+    parser.add_argument('--digits', type=int, nargs='+', default=DEFAULT_DIGIT_SIZES,
+                        help="Digit sizes to calibrate")
+    args = parser.parse_args()
+
+    save_table(calibrate(args.digits), args.output)
+
+
+if __name__ == "__main__":
+    main()
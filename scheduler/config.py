@@ -0,0 +1,35 @@
+"""
+Configuration module for the scheduler
+"""
+import os
+
+# Database configuration
+DB_HOST = os.getenv('DB_HOST', 'localhost')
+DB_PORT = os.getenv('DB_PORT', '5432')
+DB_NAME = os.getenv('DB_NAME', 'primes_db')
+DB_USER = os.getenv('DB_USER', 'postgres')
+DB_PASSWORD = os.getenv('DB_PASSWORD', 'postgres')
+
+DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+# RabbitMQ configuration
+RABBITMQ_HOST = os.getenv('RABBITMQ_HOST', 'localhost')
+RABBITMQ_PORT = os.getenv('RABBITMQ_PORT', '5672')
+RABBITMQ_USER = os.getenv('RABBITMQ_USER', 'guest')
+RABBITMQ_PASSWORD = os.getenv('RABBITMQ_PASSWORD', 'guest')
+RABBITMQ_QUEUE = os.getenv('RABBITMQ_QUEUE', 'prime_requests')
+RABBITMQ_JOBS_QUEUE = os.getenv('RABBITMQ_JOBS_QUEUE', 'prime_jobs')
+
+RABBITMQ_URL = f"amqp://{RABBITMQ_USER}:{RABBITMQ_PASSWORD}@{RABBITMQ_HOST}:{RABBITMQ_PORT}/"
+
+# Scheduler configuration
+# Messages kept ready in the worker queue; lower values let new requests start sooner
+SCHEDULER_TARGET_DEPTH = int(os.getenv('SCHEDULER_TARGET_DEPTH', '100'))
+# Requests scheduled concurrently (jobs beyond this wait in the jobs queue)
+SCHEDULER_MAX_ACTIVE_JOBS = int(os.getenv('SCHEDULER_MAX_ACTIVE_JOBS', '1000'))
+# Wait between refills while the worker queue is at its target depth
+SCHEDULER_TICK_SECONDS = float(os.getenv('SCHEDULER_TICK_SECONDS', '0.05'))
+# How often cancelled or deleted requests are dropped from the schedule
+SCHEDULER_SWEEP_SECONDS = float(os.getenv('SCHEDULER_SWEEP_SECONDS', '10'))
+# Fixed cost of a task on top of generating its prime (queueing, storage), in seconds
+SCHEDULER_TASK_OVERHEAD_SECONDS = float(os.getenv('SCHEDULER_TASK_OVERHEAD_SECONDS', '0.005'))
@@ -0,0 +1,273 @@
+"""
+Fair scheduler between the API and the workers
+Consumes one job message per request and feeds the worker queue with the
+individual prime tasks, interleaving requests with deficit round robin weighted
+by the estimated cost of each prime, so a huge request cannot starve small ones
+"""
+import pika
+import json
+import logging
+import time
+import signal
+import sys
+from collections import deque
+
+from config import (
+    RABBITMQ_URL, RABBITMQ_QUEUE, RABBITMQ_JOBS_QUEUE,
+    SCHEDULER_TARGET_DEPTH, SCHEDULER_MAX_ACTIVE_JOBS, SCHEDULER_TICK_SECONDS,
+    SCHEDULER_SWEEP_SECONDS, SCHEDULER_TASK_OVERHEAD_SECONDS
+)
+import database as db
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Global flag for graceful shutdown
+shutdown_flag = False
+
+
+class Job:
+    """A request whose prime tasks are being scheduled"""
+    
+    def __init__(self, delivery_tag, request_id, digits, total, cost, next_index=1):
+        self.delivery_tag = delivery_tag
+        self.request_id = request_id
+        self.digits = digits
+        self.total = total
+        # Weight of one task in seconds, including the fixed per-message overhead
+        self.cost = cost + SCHEDULER_TASK_OVERHEAD_SECONDS
+        self.next_index = next_index
+        self.deficit = 0.0
+        self.in_turn = False
+    
+    @property
+    def remaining(self):
+        return self.total - self.next_index + 1
+
+
+# Active jobs in round robin order
+active_jobs = deque()
+
+
+def signal_handler(sig, frame):
+    """Handle shutdown signals gracefully"""
+    global shutdown_flag
+    logger.info(f"Received shutdown signal {sig}. Checkpointing active jobs...")
+    shutdown_flag = True
+
+
+def on_job(ch, method, properties, body):
+    """Add a job from the jobs queue to the schedule"""
+    try:
+        message = json.loads(body)
+        job = Job(
+            method.delivery_tag,
+            message['request_id'],
+            message['digits'],
+            message['quantity'],
+            message.get('cost', 0.0),
+            message.get('next_index', 1)
+        )
+    except (ValueError, KeyError) as e:
+        logger.error(f"Invalid job message: {e}")
+        ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+        return
+    
+    try:
+        if method.redelivered:
+            # The scheduler stopped without checkpointing this job: resume after the
+            # primes already stored (workers drop the surplus of tasks still queued)
+            status_data = db.get_request_status(job.request_id)
+            if status_data:
+                job.next_index = max(job.next_index, status_data['generated_count'] + 1)
+    except Exception as e:
+        logger.error(f"Error resuming job {job.request_id}: {e}")
+        ch.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
+        return
+    
+    if job.remaining <= 0:
+        ch.basic_ack(delivery_tag=method.delivery_tag)
+        return
+    
+    active_jobs.append(job)
+    logger.info(f"Scheduling request {job.request_id}: {job.remaining} primes of {job.digits} digits")
+
+
+def publish_task(channel, job):
+    """Publish the next prime task of a job to the worker queue"""
+    message = {
+        'request_id': job.request_id,
+        'digits': job.digits,
+        'index': job.next_index,
+        'total': job.total
+    }
+    channel.basic_publish(
+        exchange='',
+        routing_key=RABBITMQ_QUEUE,
+        body=json.dumps(message),
+        properties=pika.BasicProperties(
+            delivery_mode=2,  # Make message persistent
+        )
+    )
+    job.next_index += 1
+
+
+def dispatch(channel, slots):
+    """
+    Publish up to slots tasks using deficit round robin over the active jobs
+    Each turn a job earns the cost of the cheapest task, so the cheapest job sends
+    one task per turn and expensive jobs save up over several turns: every job
+    gets an equal share of worker time and none waits more than a round to start
+    """
+    quantum = min(job.cost for job in active_jobs)
+    dispatched = 0
+    
+    while dispatched < slots and active_jobs:
+        job = active_jobs[0]
+        if not job.in_turn:
+            job.deficit += quantum
+            job.in_turn = True
+        
+        while job.deficit >= job.cost and job.remaining > 0 and dispatched < slots:
+            publish_task(channel, job)
+            job.deficit -= job.cost
+            dispatched += 1
+        
+        if job.remaining <= 0:
+            active_jobs.popleft()
+            channel.basic_ack(delivery_tag=job.delivery_tag)
+            logger.info(f"All tasks of request {job.request_id} dispatched")
+        elif dispatched < slots:
+            # Turn over, move on to the next job
+            job.in_turn = False
+            active_jobs.rotate(-1)
+    
+    return dispatched
+
+
+def sweep(channel):
+    """Drop jobs whose requests were cancelled or deleted"""
+    states = db.get_request_states([job.request_id for job in active_jobs])
+    for job in list(active_jobs):
+        status = states.get(job.request_id)
+        if status is None or status == 'cancelled':
+            active_jobs.remove(job)
+            channel.basic_ack(delivery_tag=job.delivery_tag)
+            logger.info(f"Dropped request {job.request_id}: {status or 'deleted'}")
+
+
+def checkpoint(channel):
+    """Requeue active jobs with their progress so a restart resumes where it stopped"""
+    while active_jobs:
+        job = active_jobs.popleft()
+        message = {
+            'request_id': job.request_id,
+            'digits': job.digits,
+            'quantity': job.total,
+            'cost': job.cost - SCHEDULER_TASK_OVERHEAD_SECONDS,
+            'next_index': job.next_index
+        }
+        channel.basic_publish(
+            exchange='',
+            routing_key=RABBITMQ_JOBS_QUEUE,
+            body=json.dumps(message),
+            properties=pika.BasicProperties(
+                delivery_mode=2,  # Make message persistent
+            )
+        )
+        channel.basic_ack(delivery_tag=job.delivery_tag)
+
+
+def main():
+    """Main scheduler loop"""
+    global shutdown_flag
+    
+    # Register signal handlers
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    
+    logger.info("Starting scheduler...")
+    
+    # Initialize database connection pool
+    try:
+        db.init_db_pool(maxconn=2)
+        logger.info("Database connection pool initialized")
+    except Exception as e:
+        logger.error(f"Failed to initialize database: {e}")
+        sys.exit(1)
+    
+    # Connect to RabbitMQ with retry logic
+    max_retries = 10
+    retry_delay = 5
+    
+    for attempt in range(max_retries):
+        # Jobs of a previous connection are redelivered by the broker
+        active_jobs.clear()
+        try:
+            connection = pika.BlockingConnection(pika.URLParameters(RABBITMQ_URL))
+            channel = connection.channel()
+            
+            # Declare queues (idempotent)
+            channel.queue_declare(queue=RABBITMQ_JOBS_QUEUE, durable=True)
+            channel.queue_declare(queue=RABBITMQ_QUEUE, durable=True)
+            
+            # Tasks are confirmed by the broker before their job is acked
+            channel.confirm_delivery()
+            
+            # Jobs stay unacked while they are active
+            channel.basic_qos(prefetch_count=SCHEDULER_MAX_ACTIVE_JOBS)
+            consumer_tag = channel.basic_consume(
+                queue=RABBITMQ_JOBS_QUEUE,
+                on_message_callback=on_job,
+                auto_ack=False
+            )
+            
+            logger.info("Connected to RabbitMQ, waiting for jobs...")
+            
+            last_sweep = time.time()
+            wait = SCHEDULER_TICK_SECONDS
+            while not shutdown_flag:
+                connection.process_data_events(time_limit=wait)
+                wait = SCHEDULER_TICK_SECONDS
+                
+                if active_jobs:
+                    # Keep the worker queue shallow so new requests get their turn quickly
+                    depth = channel.queue_declare(queue=RABBITMQ_QUEUE, durable=True).method.message_count
+                    if depth < SCHEDULER_TARGET_DEPTH:
+                        dispatch(channel, SCHEDULER_TARGET_DEPTH - depth)
+                        # The workers are draining the queue: check again right away
+                        # instead of waiting a tick, which would cap their throughput
+                        wait = 0
+                
+                if time.time() - last_sweep >= SCHEDULER_SWEEP_SECONDS:
+                    sweep(channel)
+                    last_sweep = time.time()
+            
+            # Graceful shutdown
+            logger.info("Shutting down gracefully...")
+            channel.basic_cancel(consumer_tag)
+            checkpoint(channel)
+            connection.close()
+            db.close_db_pool()
+            logger.info("Scheduler stopped")
+            sys.exit(0)
+        
+        except pika.exceptions.AMQPConnectionError as e:
+            if attempt < max_retries - 1:
+                logger.warning(f"Failed to connect to RabbitMQ (attempt {attempt + 1}/{max_retries}): {e}")
+                logger.info(f"Retrying in {retry_delay} seconds...")
+                time.sleep(retry_delay)
+            else:
+                logger.error(f"Failed to connect to RabbitMQ after {max_retries} attempts")
+                sys.exit(1)
+        except Exception as e:
+            logger.error(f"Unexpected error: {e}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
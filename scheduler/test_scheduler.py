@@ -0,0 +1,57 @@
+"""
+Checks of the deficit round robin dispatch, run with: python -m pytest scheduler
+"""
+import json
+
+import scheduler
+from scheduler import Job, active_jobs, dispatch
+
+
+class FakeChannel:
+    """Records the tasks published to the worker queue"""
+
+    def __init__(self):
+        self.published = []
+        self.acked = []
+
+    def basic_publish(self, exchange, routing_key, body, properties=None):
+        self.published.append(json.loads(body))
+
+    def basic_ack(self, delivery_tag):
+        self.acked.append(delivery_tag)
+
+
+def test_small_job_dispatched_within_one_tick():
+    """A small job must not wait behind a cheap bulk job while an expensive job is active"""
+    active_jobs.clear()
+    active_jobs.extend([
+        Job(1, 'bulk', 12, 1_000_000, 0.0002),
+        Job(2, 'huge', 1000, 10, 25.4),
+        Job(3, 'small', 12, 5, 0.0002),
+    ])
+    channel = FakeChannel()
+
+    dispatch(channel, scheduler.SCHEDULER_TARGET_DEPTH)
+
+    requests = [task['request_id'] for task in channel.published]
+    assert requests.count('small') == 5
+    assert 3 in channel.acked
+    active_jobs.clear()
+
+
+def test_expensive_job_gets_its_share():
+    """An expensive job saves up over several turns instead of being skipped forever"""
+    active_jobs.clear()
+    active_jobs.extend([
+        Job(1, 'cheap', 12, 1_000_000, 0.0),
+        Job(2, 'expensive', 20, 1_000_000, 4 * scheduler.SCHEDULER_TASK_OVERHEAD_SECONDS),
+    ])
+    channel = FakeChannel()
+
+    for _ in range(10):
+        dispatch(channel, 100)
+
+    requests = [task['request_id'] for task in channel.published]
+    # The expensive task costs 5 times the cheap one, so it gets a sixth of the tasks
+    assert abs(requests.count('expensive') - len(requests) / 6) <= 2
+    active_jobs.clear()
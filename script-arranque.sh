@@ -7,37 +7,42 @@ echo "=== Desplegando en Kubernetes ==="
 echo ""
 
 # 1. Namespace
-echo "[1/8] Creando namespace..."
+echo "[1/9] Creando namespace..."
 kubectl apply -f k8s/namespace.yaml
 
 # 2. Config
-echo "[2/8] Aplicando configuración..."
+echo "[2/9] Aplicando configuración..."
 kubectl apply -f k8s/config.yaml
+kubectl apply -f k8s/tuning.yaml
 
 # 3. PostgreSQL
-echo "[3/8] Desplegando PostgreSQL..."
+echo "[3/9] Desplegando PostgreSQL..."
 kubectl apply -f k8s/postgres.yaml
 
 # 4. RabbitMQ
-echo "[4/8] Desplegando RabbitMQ..."
+echo "[4/9] Desplegando RabbitMQ..."
 kubectl apply -f k8s/rabbitmq.yaml
 
 # 5.  Esperar Postgres
-echo "[5/8] Esperando PostgreSQL..."
+echo "[5/9] Esperando PostgreSQL..."
 kubectl wait --for=condition=ready pod -l app=postgres -n prime-system --timeout=120s
 
 # 6. Esperar RabbitMQ
-echo "[6/8] Esperando RabbitMQ..."
+echo "[6/9] Esperando RabbitMQ..."
 kubectl wait --for=condition=ready pod -l app=rabbitmq -n prime-system --timeout=120s
 
 # 7. Microservices
-echo "[7/8] Desplegando microservicios..."
+echo "[7/9] Desplegando microservicios..."
 kubectl apply -f k8s/microservices.yaml
 
 # 8. Workers
-echo "[8/8] Desplegando workers..."
+echo "[8/9] Desplegando workers..."
 kubectl apply -f k8s/workers.yaml
 
+# 9. Scheduler
+echo "[9/9] Desplegando scheduler..."
+kubectl apply -f k8s/scheduler.yaml
+
 echo ""
 echo "Despliegue completado!"
 echo ""
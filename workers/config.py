@@ -24,3 +24,30 @@ RABBITMQ_URL = f"amqp://{RABBITMQ_USER}:{RABBITMQ_PASSWORD}@{RABBITMQ_HOST}:{RAB
 # Worker configuration
 WORKER_ID = os.getenv('WORKER_ID', 'worker-1')
 PREFETCH_COUNT = int(os.getenv('PREFETCH_COUNT', '1'))
+
+# Tuning configuration
+TUNING_FILE = os.getenv('TUNING_FILE', 'tuning.json')
+CALIBRATE_ON_STARTUP = os.getenv('CALIBRATE_ON_STARTUP', 'false').lower() == 'true'
+
+# Write-behind buffer configuration
+# Generated primes are stored in one transaction per WRITE_BUFFER_SIZE rows or
+# every WRITE_BUFFER_FLUSH_MS milliseconds, and their messages acked after that
+# (the buffer never holds more than PREFETCH_COUNT messages)
+WRITE_BUFFER_SIZE = int(os.getenv('WRITE_BUFFER_SIZE', '20'))
+WRITE_BUFFER_FLUSH_MS = int(os.getenv('WRITE_BUFFER_FLUSH_MS', '200'))
+
+# Telemetry configuration
+# A breakdown of the time spent in each processing stage is logged every
+# STATS_LOG_SECONDS; with TRACE_FILE set, the spans of every message are also
+# appended to it as OTLP/JSON lines
+TRACE_FILE = os.getenv('TRACE_FILE', '')
+STATS_LOG_SECONDS = int(os.getenv('STATS_LOG_SECONDS', '60'))
+
+# Profiling configuration
+# SIGUSR1 (or PROFILE_ON_STARTUP) profiles the worker for PROFILE_WINDOW_SECONDS and
+# writes the profile to PROFILE_DIR; PROFILE_MODE is 'sample' (folded stacks for
+# flame graphs) or 'cprofile' (.prof file)
+PROFILE_DIR = os.getenv('PROFILE_DIR', '/tmp/profiles')
+PROFILE_WINDOW_SECONDS = int(os.getenv('PROFILE_WINDOW_SECONDS', '30'))
+PROFILE_MODE = os.getenv('PROFILE_MODE', 'sample')
+PROFILE_ON_STARTUP = os.getenv('PROFILE_ON_STARTUP', 'false').lower() == 'true'
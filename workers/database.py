@@ -2,8 +2,8 @@
 Database connection and operations module
 """
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from psycopg2.pool import SimpleConnectionPool
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool
 from contextlib import contextmanager
 import logging
 from config import DATABASE_URL
@@ -18,7 +18,7 @@ def init_db_pool(minconn=1, maxconn=10):
     """Initialize database connection pool"""
     global connection_pool
     try:
-        connection_pool = SimpleConnectionPool(
+        connection_pool = ThreadedConnectionPool(
             minconn,
             maxconn,
             DATABASE_URL
@@ -60,18 +60,46 @@ def create_request(quantity, digits):
             return dict(result)
 
 
+def create_completed_request(quantity, digits, prime_values):
+    """Create a request together with its generated prime numbers in one transaction"""
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            try:
+                cursor.execute(
+                    """
+                    INSERT INTO requests (quantity, digits, status, generated_count)
+                    VALUES (%s, %s, 'completed', %s)
+                    RETURNING id, quantity, digits, status, created_at
+                    """,
+                    (quantity, digits, len(prime_values))
+                )
+                result = cursor.fetchone()
+                execute_values(
+                    cursor,
+                    """
+                    INSERT INTO prime_numbers (request_id, prime_value)
+                    VALUES %s
+                    ON CONFLICT (request_id, prime_value) DO NOTHING
+                    """,
+                    [(result['id'], str(p)) for p in prime_values]
+                )
+                conn.commit()
+                return dict(result)
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Error creating completed request: {e}")
+                raise
+
+
 def get_request_status(request_id):
     """Get the status of a request"""
     with get_db_connection() as conn:
         with conn.cursor(cursor_factory=RealDictCursor) as cursor:
             cursor.execute(
                 """
-                SELECT r.id, r.quantity, r.digits, r.status, r.created_at,
-                       COUNT(p.id) as generated_count
-                FROM requests r
-                LEFT JOIN prime_numbers p ON r.id = p.request_id
-                WHERE r.id = %s
-                GROUP BY r.id, r.quantity, r.digits, r.status, r.created_at
+                SELECT id, quantity, digits, status, created_at, generated_count
+                FROM requests
+                WHERE id = %s
                 """,
                 (request_id,)
             )
@@ -96,6 +124,34 @@ def get_request_results(request_id):
             return [dict(row) for row in results]
 
 
+def iter_request_results(request_id, batch_size=10000):
+    """
+    Yield the generated prime numbers of a request in batches of decimal strings
+    Reads through a server-side cursor, so large results are never fully in memory.
+    Uses a dedicated connection, so a slow download does not hold one of the pool
+    """
+    conn = psycopg2.connect(DATABASE_URL)
+    try:
+        with conn.cursor(name=f"export_{request_id.replace('-', '')}") as cursor:
+            cursor.itersize = batch_size
+            cursor.execute(
+                """
+                SELECT prime_value
+                FROM prime_numbers
+                WHERE request_id = %s
+                ORDER BY created_at, id
+                """,
+                (request_id,)
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [row[0] for row in rows]
+    finally:
+        conn.close()
+
+
 def add_prime_number(request_id, prime_value):
     """Add a generated prime number to the database"""
     with get_db_connection() as conn:
@@ -109,14 +165,103 @@ def add_prime_number(request_id, prime_value):
                     """,
                     (request_id, str(prime_value))
                 )
+                added = cursor.rowcount > 0
+                if added:
+                    cursor.execute(
+                        "UPDATE requests SET generated_count = generated_count + 1 WHERE id = %s",
+                        (request_id,)
+                    )
                 conn.commit()
-                return cursor.rowcount > 0
+                return added
             except Exception as e:
                 conn.rollback()
                 logger.error(f"Error adding prime number: {e}")
                 raise
 
 
+def add_prime_numbers(rows):
+    """
+    Add a batch of generated prime numbers in one transaction
+    rows is a list of (request_id, prime_value); rows of cancelled or deleted
+    requests are skipped, and so are rows beyond the quantity of their request
+    (a restarted scheduler may dispatch more tasks than needed). The generated_count
+    of each request is updated in the same transaction. Returns the status of each
+    request, the set of (request_id, prime_value) pairs actually inserted and the
+    set of requests that have all their primes
+    """
+    request_ids = sorted({request_id for request_id, _ in rows})
+    with get_db_connection() as conn:
+        with conn.cursor() as cursor:
+            try:
+                # Lock the requests until the batch is committed: against deletion, and
+                # against concurrent batches so the quantity check cannot race
+                cursor.execute(
+                    """
+                    SELECT id, status, quantity, generated_count
+                    FROM requests
+                    WHERE id = ANY(%s::uuid[])
+                    ORDER BY id
+                    FOR NO KEY UPDATE
+                    """,
+                    (request_ids,)
+                )
+                requests = {str(row[0]): (row[1], row[2], row[3]) for row in cursor.fetchall()}
+                states = {request_id: status for request_id, (status, _, _) in requests.items()}
+                remaining = {
+                    request_id: quantity - generated
+                    for request_id, (status, quantity, generated) in requests.items()
+                    if status != 'cancelled'
+                }
+                
+                live_rows = []
+                for request_id, prime_value in rows:
+                    if remaining.get(request_id, 0) > 0:
+                        remaining[request_id] -= 1
+                        live_rows.append((request_id, str(prime_value)))
+                
+                inserted = []
+                if live_rows:
+                    inserted = execute_values(
+                        cursor,
+                        """
+                        INSERT INTO prime_numbers (request_id, prime_value)
+                        VALUES %s
+                        ON CONFLICT (request_id, prime_value) DO NOTHING
+                        RETURNING request_id, prime_value
+                        """,
+                        live_rows,
+                        page_size=len(live_rows),
+                        fetch=True
+                    )
+                
+                inserted = {(str(row[0]), row[1]) for row in inserted}
+                stored = {}
+                for request_id, _ in inserted:
+                    stored[request_id] = stored.get(request_id, 0) + 1
+                if stored:
+                    execute_values(
+                        cursor,
+                        """
+                        UPDATE requests
+                        SET generated_count = requests.generated_count + batch.stored
+                        FROM (VALUES %s) AS batch (id, stored)
+                        WHERE requests.id = batch.id::uuid
+                        """,
+                        list(stored.items())
+                    )
+                conn.commit()
+                
+                full = {
+                    request_id for request_id, (status, quantity, generated) in requests.items()
+                    if generated + stored.get(request_id, 0) >= quantity
+                }
+                return states, inserted, full
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Error adding prime numbers: {e}")
+                raise
+
+
 def update_request_status(request_id, status):
     """Update the status of a request"""
     with get_db_connection() as conn:
@@ -132,6 +277,206 @@ def update_request_status(request_id, status):
             conn.commit()
 
 
+def get_request_state(request_id):
+    """Get the current status of a request, or None if it does not exist"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT status
+                FROM requests
+                WHERE id = %s
+                """,
+                (request_id,)
+            )
+            result = cursor.fetchone()
+            return result[0] if result else None
+
+
+def get_request_states(request_ids):
+    """Get the current status of several requests, keyed by request id"""
+    if not request_ids:
+        return {}
+    with get_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT id, status
+                FROM requests
+                WHERE id = ANY(%s::uuid[])
+                """,
+                (list(request_ids),)
+            )
+            return {str(row[0]): row[1] for row in cursor.fetchall()}
+
+
+def cancel_request(request_id):
+    """Cancel a pending request, returns False if it is not pending"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE requests
+                SET status = 'cancelled'
+                WHERE id = %s AND status = 'pending'
+                """,
+                (request_id,)
+            )
+            conn.commit()
+            return cursor.rowcount > 0
+
+
+def delete_request(request_id):
+    """Delete a request and its generated prime numbers, returns False if it does not exist"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                DELETE FROM requests
+                WHERE id = %s
+                """,
+                (request_id,)
+            )
+            conn.commit()
+            return cursor.rowcount > 0
+
+
+def get_pending_backlog():
+    """Get the number of primes still to be generated for pending requests, per digit count"""
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(
+                """
+                SELECT digits,
+                       COUNT(id) as request_count,
+                       SUM(GREATEST(quantity - generated_count, 0)) as outstanding
+                FROM requests
+                WHERE status = 'pending'
+                GROUP BY digits
+                ORDER BY digits
+                """
+            )
+            results = cursor.fetchall()
+            return [dict(row) for row in results]
+
+
+def get_pending_check_backlog():
+    """
+    Get the numbers still to be checked for pending check requests and their estimated
+    seconds, assuming the unchecked share of each batch costs its share of the estimate
+    """
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(
+                """
+                SELECT COUNT(c.id) as request_count,
+                       COALESCE(SUM(c.quantity - r.checked_count), 0) as unchecked,
+                       COALESCE(SUM(c.estimated_seconds * (c.quantity - r.checked_count) / c.quantity), 0)
+                           as estimated_seconds
+                FROM check_requests c
+                CROSS JOIN LATERAL (
+                    SELECT COUNT(*) as checked_count
+                    FROM check_results
+                    WHERE request_id = c.id
+                ) r
+                WHERE c.status = 'pending'
+                """
+            )
+            return dict(cursor.fetchone())
+
+
+def create_check_request(quantity, estimated_seconds=0.0):
+    """Create a new primality check request"""
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(
+                """
+                INSERT INTO check_requests (quantity, status, estimated_seconds)
+                VALUES (%s, 'pending', %s)
+                RETURNING id, quantity, status, created_at
+                """,
+                (quantity, estimated_seconds)
+            )
+            result = cursor.fetchone()
+            conn.commit()
+            return dict(result)
+
+
+def get_check_request_status(request_id):
+    """Get the status of a primality check request"""
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(
+                """
+                SELECT c.id, c.quantity, c.status, c.created_at,
+                       COUNT(r.id) as checked_count
+                FROM check_requests c
+                LEFT JOIN check_results r ON c.id = r.request_id
+                WHERE c.id = %s
+                GROUP BY c.id, c.quantity, c.status, c.created_at
+                """,
+                (request_id,)
+            )
+            result = cursor.fetchone()
+            return dict(result) if result else None
+
+
+def get_check_results(request_id):
+    """Get all primality verdicts for a check request, in submission order"""
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(
+                """
+                SELECT position, value, is_prime
+                FROM check_results
+                WHERE request_id = %s
+                ORDER BY position
+                """,
+                (request_id,)
+            )
+            results = cursor.fetchall()
+            return [dict(row) for row in results]
+
+
+def add_check_results(request_id, offset, values, verdicts):
+    """Add a chunk of primality verdicts starting at the given position"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cursor:
+            try:
+                execute_values(
+                    cursor,
+                    """
+                    INSERT INTO check_results (request_id, position, value, is_prime)
+                    VALUES %s
+                    ON CONFLICT (request_id, position) DO NOTHING
+                    """,
+                    [
+                        (request_id, offset + i, str(value), verdict)
+                        for i, (value, verdict) in enumerate(zip(values, verdicts))
+                    ]
+                )
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Error adding check results: {e}")
+                raise
+
+
+def update_check_request_status(request_id, status):
+    """Update the status of a primality check request"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE check_requests
+                SET status = %s
+                WHERE id = %s
+                """,
+                (status, request_id)
+            )
+            conn.commit()
+
+
 def close_db_pool():
     """Close all connections in the pool"""
     global connection_pool
@@ -0,0 +1,277 @@
+"""
+Timing telemetry and on-demand profiling for the worker
+Every message gets a trace with one span per processing stage (decode, generate,
+buffer wait, database flush, ack). Spans are aggregated into a periodic stage
+breakdown in the log and, if TRACE_FILE is set, exported as OTLP/JSON lines
+that the OpenTelemetry Collector otlpjsonfile receiver can ingest.
+The profiler records the hot path for a time window, triggered by SIGUSR1 or
+PROFILE_ON_STARTUP, and dumps a cProfile .prof file or folded stacks for flame graphs.
+"""
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+import cProfile
+import json
+import logging
+import os
+import secrets
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Interval between stack samples of the sampling profiler, in seconds
+SAMPLE_INTERVAL_SECONDS = 0.005
+
+SCOPE_NAME = 'prime-worker'
+
+
+def attribute_value(value):
+    """Encode an attribute value as an OTLP/JSON AnyValue"""
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def encode_attributes(attributes):
+    return [{'key': key, 'value': attribute_value(value)} for key, value in attributes.items()]
+
+
+class SpanExporter:
+    """Appends traces to a file as OTLP/JSON, one ExportTraceServiceRequest per line"""
+
+    def __init__(self, path, service_name, worker_id):
+        self.path = path
+        self.file = open(path, 'a', buffering=1)
+        self.resource = {
+            'attributes': encode_attributes({'service.name': service_name, 'service.instance.id': worker_id})
+        }
+
+    def export(self, spans):
+        request = {
+            'resourceSpans': [{
+                'resource': self.resource,
+                'scopeSpans': [{'scope': {'name': SCOPE_NAME}, 'spans': spans}]
+            }]
+        }
+        self.file.write(json.dumps(request, separators=(',', ':')) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+class StageStats:
+    """Totals of stage durations and counters, logged as a breakdown and reset periodically"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started_at = time.monotonic()
+        self.seconds = defaultdict(float)
+        self.calls = Counter()
+        self.counters = Counter()
+
+    def record(self, name, seconds):
+        self.seconds[name] += seconds
+        self.calls[name] += 1
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def summary(self):
+        """Return the breakdown since the last reset and start a new period"""
+        elapsed = time.monotonic() - self.started_at
+        primes = self.counters['primes']
+        summary = {
+            'period_seconds': round(elapsed, 1),
+            'messages': self.counters['messages'],
+            'primes': primes,
+            'primes_per_second': round(primes / elapsed, 2) if elapsed else 0.0,
+            'candidates_per_prime': round(self.counters['candidates'] / primes, 2) if primes else 0.0,
+            'duplicate_retries': self.counters['duplicate_retries'],
+            # Average time each message spends in each stage; stages of buffered
+            # messages overlap, so these do not add up to the period
+            'stages_avg_ms': {
+                name: round(total / self.calls[name] * 1000, 3)
+                for name, total in sorted(self.seconds.items(), key=lambda item: -item[1] / self.calls[item[0]])
+            }
+        }
+        self.reset()
+        return summary
+
+
+class Trace:
+    """Spans of one message, exported together when the message is finished"""
+
+    def __init__(self, name, attributes=None):
+        self.trace_id = secrets.token_hex(16)
+        self.root_id = secrets.token_hex(8)
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.attributes = dict(attributes or {})
+        self.spans = []
+
+    def span(self, name, start_ns, end_ns, attributes=None):
+        """Record a finished stage span"""
+        self.spans.append((name, start_ns, end_ns, attributes or {}))
+        stats.record(name, (end_ns - start_ns) / 1e9)
+
+    @contextmanager
+    def stage(self, name, attributes=None):
+        """Time the enclosed block as a stage span; the yielded dict holds extra attributes"""
+        attributes = dict(attributes or {})
+        start_ns = time.time_ns()
+        try:
+            yield attributes
+        finally:
+            self.span(name, start_ns, time.time_ns(), attributes)
+
+    def finish(self, **attributes):
+        """End the trace and export it"""
+        self.attributes.update(attributes)
+        stats.count('messages')
+        if exporter is None:
+            return
+
+        spans = [{
+            'traceId': self.trace_id,
+            'spanId': self.root_id,
+            'name': self.name,
+            'kind': 5,  # SPAN_KIND_CONSUMER
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(time.time_ns()),
+            'attributes': encode_attributes(self.attributes)
+        }]
+        for name, start_ns, end_ns, span_attributes in self.spans:
+            spans.append({
+                'traceId': self.trace_id,
+                'spanId': secrets.token_hex(8),
+                'parentSpanId': self.root_id,
+                'name': name,
+                'kind': 1,  # SPAN_KIND_INTERNAL
+                'startTimeUnixNano': str(start_ns),
+                'endTimeUnixNano': str(end_ns),
+                'attributes': encode_attributes(span_attributes)
+            })
+        try:
+            exporter.export(spans)
+        except Exception as e:
+            logger.warning(f"Error exporting trace: {e}")
+
+
+class Profiler:
+    """
+    Profiles the worker for a time window and dumps the result to a directory
+    Mode 'cprofile' writes a .prof file (pstats, snakeviz, flameprof); mode 'sample'
+    samples the main thread stack and writes folded stacks (flamegraph.pl, speedscope)
+    """
+
+    def __init__(self, directory, window_seconds, mode, worker_id):
+        self.directory = directory
+        self.window_seconds = window_seconds
+        self.mode = mode
+        self.worker_id = worker_id
+        self.requested = False
+        self.active = False
+        self.ends_at = 0.0
+        self._profile = None
+        self._sampler = None
+        self._samples = Counter()
+        self._stop = threading.Event()
+
+    def request(self):
+        """Ask for a profiling window; safe to call from a signal handler"""
+        self.requested = True
+
+    def poll(self):
+        """Start or stop the profiling window, called from the main loop"""
+        if self.requested and not self.active:
+            self.requested = False
+            self.start()
+        elif self.active and time.monotonic() >= self.ends_at:
+            self.stop()
+
+    def start(self):
+        self.active = True
+        self.ends_at = time.monotonic() + self.window_seconds
+        if self.mode == 'cprofile':
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._samples.clear()
+            self._stop.clear()
+            self._sampler = threading.Thread(
+                target=self._sample, args=(threading.main_thread().ident,), daemon=True
+            )
+            self._sampler.start()
+        logger.info(f"Profiling ({self.mode}) for {self.window_seconds}s...")
+
+    def stop(self):
+        """End the profiling window and dump the profile, returns its path"""
+        if not self.active:
+            return None
+        self.active = False
+
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, f"{self.worker_id}-{time.strftime('%Y%m%d-%H%M%S')}")
+        try:
+            if self.mode == 'cprofile':
+                self._profile.disable()
+                path = base + '.prof'
+                self._profile.dump_stats(path)
+                self._profile = None
+            else:
+                self._stop.set()
+                self._sampler.join()
+                path = base + '.folded'
+                with open(path, 'w') as f:
+                    for stack, count in self._samples.most_common():
+                        f.write(f"{stack} {count}\n")
+        except Exception as e:
+            logger.error(f"Error writing profile: {e}")
+            return None
+
+        logger.info(f"Profile written to {path}")
+        return path
+
+    def _sample(self, thread_id):
+        while not self._stop.wait(SAMPLE_INTERVAL_SECONDS):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self._samples[';'.join(reversed(stack))] += 1
+
+
+# Stage totals of the current logging period
+stats = StageStats()
+
+# Trace exporter, None when TRACE_FILE is not set
+exporter = None
+
+
+def setup(trace_file, service_name, worker_id):
+    """Enable the trace exporter if a trace file is configured"""
+    global exporter
+    if not trace_file:
+        return
+    try:
+        exporter = SpanExporter(trace_file, service_name, worker_id)
+        logger.info(f"Exporting traces to {trace_file}")
+    except OSError as e:
+        logger.error(f"Error opening trace file {trace_file}: {e}")
+
+
+def shutdown():
+    global exporter
+    if exporter is not None:
+        exporter.close()
+        exporter = None
@@ -9,9 +9,16 @@ import time
 import signal
 import sys
 
-from config import RABBITMQ_URL, RABBITMQ_QUEUE, WORKER_ID, PREFETCH_COUNT
+from config import (
+    RABBITMQ_URL, RABBITMQ_QUEUE, WORKER_ID, PREFETCH_COUNT,
+    TUNING_FILE, CALIBRATE_ON_STARTUP, WRITE_BUFFER_SIZE, WRITE_BUFFER_FLUSH_MS,
+    TRACE_FILE, STATS_LOG_SECONDS, PROFILE_DIR, PROFILE_WINDOW_SECONDS, PROFILE_MODE,
+    PROFILE_ON_STARTUP
+)
 import database as db
-from prime_utils import generate_prime
+import telemetry
+import tuning
+from prime_utils import generate_prime, check_primes
 
 # Configure logging
 logging.basicConfig(
@@ -23,62 +30,244 @@ logger = logging.getLogger(__name__)
 # Global flag for graceful shutdown
 shutdown_flag = False
 
+# Unacked messages never exceed the prefetch count, so neither can the buffer
+BUFFER_SIZE = max(1, min(WRITE_BUFFER_SIZE, PREFETCH_COUNT))
+BUFFER_FLUSH_SECONDS = WRITE_BUFFER_FLUSH_MS / 1000
+
+# Shortest wait for broker events in the main loop, so WRITE_BUFFER_FLUSH_MS=0
+# (flush after every message) does not turn it into a busy loop
+MIN_POLL_SECONDS = 0.05
+
+# Attempts to store a unique prime for a task before rejecting it
+MAX_DUPLICATE_RETRIES = 10
+
+# Generated primes waiting to be stored, with the delivery tags of their messages
+write_buffer = []
+
+# Write-behind buffer statistics, logged after every flush
+buffer_stats = {'flushes': 0, 'rows': 0, 'last_flush_ms': 0.0, 'max_flush_ms': 0.0, 'max_wait_ms': 0.0}
+
+# Requests found cancelled, deleted or complete at flush time, whose remaining tasks are skipped
+dropped_requests = set()
+MAX_DROPPED_REQUESTS = 10000
+
+# On-demand profiler of the hot path
+profiler = telemetry.Profiler(PROFILE_DIR, PROFILE_WINDOW_SECONDS, PROFILE_MODE, WORKER_ID)
+
 
 def signal_handler(sig, frame):
     """Handle shutdown signals gracefully"""
     global shutdown_flag
-    logger.info(f"Received shutdown signal {sig}. Finishing current task...")
+    logger.info(f"Received shutdown signal {sig}. Finishing current task and requeuing the rest...")
     shutdown_flag = True
 
 
+def profile_signal_handler(sig, frame):
+    """Start a profiling window on SIGUSR1"""
+    profiler.request()
+
+
+def process_check_message(ch, method, message, trace):
+    """Process a chunk of a primality check request"""
+    request_id = message['request_id']
+    offset = message['offset']
+    numbers = [int(n) for n in message['numbers']]
+    total = message['total']
+    
+    logger.info(f"[{WORKER_ID}] Checking {len(numbers)} numbers for check request {request_id} (offset {offset}/{total})")
+    
+    start_time = time.time()
+    with trace.stage('check', {'numbers': len(numbers)}):
+        verdicts = check_primes(numbers)
+    check_time = time.time() - start_time
+    
+    with trace.stage('db_insert', {'rows': len(numbers)}):
+        db.add_check_results(request_id, offset, numbers, verdicts)
+    
+    with trace.stage('ack'):
+        ch.basic_ack(delivery_tag=method.delivery_tag)
+    trace.finish(**{'request.id': request_id, 'outcome': 'checked'})
+    logger.info(f"[{WORKER_ID}] Checked {len(numbers)} numbers in {check_time:.2f}s for check request {request_id}")
+
+
+def buffer_prime(entry):
+    """Generate the prime of a task and add it to the write buffer"""
+    generation_stats = {}
+    with entry['trace'].stage('generate', {'retry': entry['retries']}) as span:
+        start_time = time.time()
+        entry['prime'] = generate_prime(entry['digits'], generation_stats)
+        generation_time = time.time() - start_time
+        
+        # Time not spent in Miller-Rabin went to drawing and sieving candidates
+        miller_rabin_seconds = generation_stats.get('miller_rabin_seconds', 0.0)
+        candidates = generation_stats.get('candidates', 0)
+        span['candidates'] = candidates
+        span['miller_rabin_seconds'] = miller_rabin_seconds
+        span['sieve_seconds'] = max(generation_time - miller_rabin_seconds, 0.0)
+    telemetry.stats.count('candidates', candidates)
+    
+    entry['buffered_at'] = time.monotonic()
+    entry['buffered_ns'] = time.time_ns()
+    write_buffer.append(entry)
+    
+    logger.info(
+        f"[{WORKER_ID}] Generated prime in {generation_time:.2f}s "
+        f"({candidates} candidates, {miller_rabin_seconds:.2f}s Miller-Rabin): {str(entry['prime'])[:20]}..."
+    )
+
+
+def finish_entry(ch, entry, outcome, flush_span, requeue=False):
+    """Ack or reject the message of a buffered entry and export its trace"""
+    trace = entry['trace']
+    flush_start_ns, flush_end_ns, batch_size = flush_span
+    trace.span('buffer_wait', entry['buffered_ns'], flush_start_ns)
+    trace.span('db_flush', flush_start_ns, flush_end_ns, {'batch_rows': batch_size})
+    
+    with trace.stage('ack'):
+        if outcome in ('stored', 'dropped', 'surplus'):
+            ch.basic_ack(delivery_tag=entry['delivery_tag'])
+        else:
+            ch.basic_nack(delivery_tag=entry['delivery_tag'], requeue=requeue)
+    trace.finish(**{'request.id': entry['request_id'], 'outcome': outcome, 'duplicate_retries': entry['retries']})
+
+
+def drop_request(request_id):
+    """Skip the remaining tasks of a request"""
+    if len(dropped_requests) >= MAX_DROPPED_REQUESTS:
+        dropped_requests.clear()
+    dropped_requests.add(request_id)
+
+
+def buffer_due():
+    """Whether the write buffer must be flushed, by size or by the age of its oldest row"""
+    if not write_buffer:
+        return False
+    return (len(write_buffer) >= BUFFER_SIZE
+            or time.monotonic() - write_buffer[0]['buffered_at'] >= BUFFER_FLUSH_SECONDS)
+
+
+def flush_buffer(ch):
+    """
+    Store the buffered primes in one transaction, then ack their messages
+    Messages are only acked once their rows are committed; if the flush fails
+    they are all requeued. Duplicate primes are regenerated into the next flush
+    """
+    global write_buffer
+    
+    if not write_buffer:
+        return
+    batch, write_buffer = write_buffer, []
+    oldest_wait_ms = (time.monotonic() - batch[0]['buffered_at']) * 1000
+    
+    start_time = time.monotonic()
+    flush_start_ns = time.time_ns()
+    try:
+        states, inserted, full = db.add_prime_numbers([(entry['request_id'], entry['prime']) for entry in batch])
+    except Exception as e:
+        logger.error(f"[{WORKER_ID}] Error flushing {len(batch)} primes, requeuing their messages: {e}")
+        flush_span = (flush_start_ns, time.time_ns(), len(batch))
+        for entry in batch:
+            finish_entry(ch, entry, 'requeued', flush_span, requeue=True)
+        return
+    flush_ms = (time.monotonic() - start_time) * 1000
+    flush_span = (flush_start_ns, time.time_ns(), len(batch))
+    
+    stored = 0
+    for entry in batch:
+        request_id = entry['request_id']
+        status = states.get(request_id)
+        key = (request_id, str(entry['prime']))
+        
+        if status is None or status == 'cancelled':
+            # Drop work for requests that were cancelled or deleted
+            drop_request(request_id)
+            finish_entry(ch, entry, 'dropped', flush_span)
+        elif key in inserted:
+            inserted.discard(key)
+            stored += 1
+            finish_entry(ch, entry, 'stored', flush_span)
+        elif request_id in full:
+            # Surplus task of a request that already has all its primes
+            finish_entry(ch, entry, 'surplus', flush_span)
+        elif entry['retries'] + 1 >= MAX_DUPLICATE_RETRIES:
+            logger.error(f"[{WORKER_ID}] Failed to generate unique prime after {MAX_DUPLICATE_RETRIES} attempts")
+            # Reject without requeue to prevent infinite loops
+            finish_entry(ch, entry, 'rejected', flush_span)
+        else:
+            # Prime already exists, generate a new one
+            logger.warning(f"[{WORKER_ID}] Duplicate prime detected for request {request_id}, regenerating...")
+            entry['trace'].span('db_flush', flush_start_ns, flush_span[1], {'batch_rows': len(batch), 'duplicate': True})
+            entry['retries'] += 1
+            telemetry.stats.count('duplicate_retries')
+            buffer_prime(entry)
+    telemetry.stats.count('primes', stored)
+    
+    # The remaining tasks of complete requests are surplus too
+    for request_id in full:
+        drop_request(request_id)
+    
+    buffer_stats['flushes'] += 1
+    buffer_stats['rows'] += stored
+    buffer_stats['last_flush_ms'] = flush_ms
+    buffer_stats['max_flush_ms'] = max(buffer_stats['max_flush_ms'], flush_ms)
+    buffer_stats['max_wait_ms'] = max(buffer_stats['max_wait_ms'], oldest_wait_ms)
+    logger.info(
+        f"[{WORKER_ID}] Flushed {stored}/{len(batch)} primes in {flush_ms:.1f}ms "
+        f"(oldest waited {oldest_wait_ms:.0f}ms, {len(write_buffer)} still buffered, "
+        f"{buffer_stats['flushes']} flushes, max {buffer_stats['max_flush_ms']:.1f}ms)"
+    )
+
+
 def process_message(ch, method, properties, body):
     """Process a single message from the queue"""
+    # Draining: hand messages delivered after the shutdown signal back to the queue
+    if shutdown_flag:
+        ch.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
+        return
+    
+    trace = telemetry.Trace('process_message', {'worker.id': WORKER_ID, 'redelivered': method.redelivered})
     try:
-        message = json.loads(body)
+        with trace.stage('decode', {'bytes': len(body)}):
+            message = json.loads(body)
+        
+        if message.get('type') == 'check':
+            # Store the buffered primes rather than holding them for the whole check
+            flush_buffer(ch)
+            process_check_message(ch, method, message, trace)
+            return
+        
         request_id = message['request_id']
         digits = message['digits']
         index = message['index']
         total = message['total']
         
-        logger.info(f"[{WORKER_ID}] Processing request {request_id} ({index}/{total}) - generating {digits}-digit prime")
-        
-        # Generate prime number
-        start_time = time.time()
-        prime = generate_prime(digits)
-        generation_time = time.time() - start_time
-        
-        logger.info(f"[{WORKER_ID}] Generated prime in {generation_time:.2f}s: {str(prime)[:20]}...")
-        
-        # Store in database (with conflict handling for uniqueness)
-        max_retries = 10
-        retry_count = 0
-        
-        while retry_count < max_retries:
-            success = db.add_prime_number(request_id, prime)
-            
-            if success:
-                logger.info(f"[{WORKER_ID}] Stored prime for request {request_id} ({index}/{total})")
-                break
-            else:
-                # Prime already exists, generate a new one
-                logger.warning(f"[{WORKER_ID}] Duplicate prime detected, regenerating...")
-                prime = generate_prime(digits)
-                retry_count += 1
-        
-        if retry_count >= max_retries:
-            logger.error(f"[{WORKER_ID}] Failed to generate unique prime after {max_retries} attempts")
-            # Reject without requeue to prevent infinite loops
-            ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+        if request_id in dropped_requests:
+            logger.info(f"[{WORKER_ID}] Skipping request {request_id} ({index}/{total}): cancelled, deleted or complete")
+            ch.basic_ack(delivery_tag=method.delivery_tag)
+            trace.finish(**{'request.id': request_id, 'outcome': 'skipped'})
             return
         
-        # Acknowledge message
-        ch.basic_ack(delivery_tag=method.delivery_tag)
-        logger.info(f"[{WORKER_ID}] Successfully completed request {request_id} ({index}/{total})")
+        logger.info(f"[{WORKER_ID}] Processing request {request_id} ({index}/{total}) - generating {digits}-digit prime")
+        
+        # The message is acked when its prime is flushed to the database
+        trace.attributes.update({'request.id': request_id, 'digits': digits})
+        buffer_prime({
+            'request_id': request_id,
+            'digits': digits,
+            'delivery_tag': method.delivery_tag,
+            'retries': 0,
+            'trace': trace
+        })
         
     except Exception as e:
         logger.error(f"[{WORKER_ID}] Error processing message: {e}")
         # Reject message and requeue for retry
         ch.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
+        trace.finish(outcome='error')
+        return
+    
+    if buffer_due():
+        flush_buffer(ch)
 
 
 def main():
@@ -88,6 +277,7 @@ def main():
     # Register signal handlers
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
+    signal.signal(signal.SIGUSR1, profile_signal_handler)
     
     logger.info(f"[{WORKER_ID}] Starting worker...")
     
@@ -99,11 +289,20 @@ def main():
         logger.error(f"[{WORKER_ID}] Failed to initialize database: {e}")
         sys.exit(1)
     
+    # Load (or calibrate) the per-digit tuning table
+    tuning.setup(TUNING_FILE, calibrate_if_missing=CALIBRATE_ON_STARTUP)
+    
+    telemetry.setup(TRACE_FILE, 'prime-worker', WORKER_ID)
+    if PROFILE_ON_STARTUP:
+        profiler.request()
+    
     # Connect to RabbitMQ with retry logic
     max_retries = 10
     retry_delay = 5
     
     for attempt in range(max_retries):
+        # Buffered messages of a previous connection are redelivered by the broker
+        write_buffer.clear()
         try:
             connection = pika.BlockingConnection(pika.URLParameters(RABBITMQ_URL))
             channel = connection.channel()
@@ -117,20 +316,33 @@ def main():
             logger.info(f"[{WORKER_ID}] Connected to RabbitMQ, waiting for messages...")
             
             # Set up consumer
-            channel.basic_consume(
+            consumer_tag = channel.basic_consume(
                 queue=RABBITMQ_QUEUE,
                 on_message_callback=process_message,
                 auto_ack=False
             )
             
-            # Start consuming
+            # Start consuming, flushing the write buffer when its oldest row is due
             while not shutdown_flag:
-                connection.process_data_events(time_limit=1)
+                connection.process_data_events(time_limit=max(BUFFER_FLUSH_SECONDS, MIN_POLL_SECONDS))
+                if buffer_due():
+                    flush_buffer(channel)
+                
+                profiler.poll()
+                if time.monotonic() - telemetry.stats.started_at >= STATS_LOG_SECONDS:
+                    logger.info(f"[{WORKER_ID}] Stage breakdown: {json.dumps(telemetry.stats.summary())}")
             
-            # Graceful shutdown
+            # Graceful shutdown: store the buffered primes and ack their messages, then
+            # cancelling the consumer nacks and requeues prefetched messages; a message
+            # still in flight when the pod is killed is requeued by the broker because
+            # it was never acked
             logger.info(f"[{WORKER_ID}] Shutting down gracefully...")
-            channel.stop_consuming()
+            while write_buffer:
+                flush_buffer(channel)
+            channel.basic_cancel(consumer_tag)
             connection.close()
+            profiler.stop()
+            telemetry.shutdown()
             db.close_db_pool()
             logger.info(f"[{WORKER_ID}] Worker stopped")
             sys.exit(0)